@@ -0,0 +1,5 @@
+from microbenchmarks.common import BENCHMARKS
+import microbenchmarks.storage
+import microbenchmarks.proxies
+import microbenchmarks.queries
+import microbenchmarks.sync
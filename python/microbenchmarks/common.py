@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+
+from rtypes import pcc_set, primarykey, dimension
+from spacetime import Dataframe
+
+BENCHMARKS = dict()
+OBJ_COUNT = 100000
+UNITS = {"s": 1, "ms": 1e3, "us": 1e6}
+
+
+class microbenchmark(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __call__(self, func):
+        BENCHMARKS[self.name] = func
+        return func
+
+
+@pcc_set
+class BaseSet(object):
+    oid = primarykey(int)
+    prop1 = dimension(int)
+    prop2 = dimension(str)
+    prop3 = dimension(float)
+    prop4 = dimension(str)
+
+    def __init__(self, oid, p1, p2, p3, p4):
+        self.oid = oid
+        self.prop1 = p1
+        self.prop2 = p2
+        self.prop3 = p3
+        self.prop4 = p4
+
+
+@pcc_set
+class Owner(object):
+    oid = primarykey(int)
+    base = dimension(BaseSet)
+
+    def __init__(self, oid, base):
+        self.oid = oid
+        self.base = base
+
+
+def make_objs(count, tp=BaseSet):
+    return [
+        tp(i, i + 1, "{0}".format(i), float(i), "{0}".format(i))
+        for i in range(count)]
+
+
+def child_of(df, appname, types, **kwargs):
+    # A dataframe that starts with the committed state of df, without
+    # going through a socket.
+    data, version = df.versioned_heap.retrieve_data("BENCH", "ROOT")
+    child = Dataframe(appname, types, **kwargs)
+    child.local_heap.receive_data(data, version)
+    return child
+
+
+def report(name, value, unit):
+    print("{0:<40}{1:>14.3f} {2}".format(name, value, unit))
+
+
+@contextmanager
+def timed(name, per=1, unit="us"):
+    '''Reports the time the block took, divided by per.'''
+    start = time.perf_counter()
+    yield
+    report(name, (time.perf_counter() - start) * UNITS[unit] / per, unit)
@@ -0,0 +1,135 @@
+import tracemalloc
+
+from rtypes import pcc_set, primarykey, dimension
+from spacetime import Dataframe
+from spacetime.utils.enums import HeapStyle
+from spacetime.managers.managed_heap import KEEP_PROXIES
+from microbenchmarks.common import (
+    microbenchmark, BaseSet, Owner, OBJ_COUNT, make_objs, child_of, report,
+    timed)
+
+
+@pcc_set
+class SlotBaseSet(object):
+    __slots__ = ()
+    oid = primarykey(int)
+    prop1 = dimension(int)
+    prop2 = dimension(str)
+    prop3 = dimension(float)
+    prop4 = dimension(str)
+
+    def __init__(self, oid, p1, p2, p3, p4):
+        self.oid = oid
+        self.prop1 = p1
+        self.prop2 = p2
+        self.prop3 = p3
+        self.prop4 = p4
+
+
+@microbenchmark("attribute")
+def attribute(count=OBJ_COUNT):
+    row = Dataframe("BENCH_ATTRIBUTE", [BaseSet])
+    columnar = Dataframe(
+        "BENCH_ATTRIBUTE_COLUMNAR", [BaseSet], heap_as=HeapStyle.Columnar)
+    for df in (row, columnar):
+        df.add_many(BaseSet, make_objs(1000))
+    objs = row.read_all(BaseSet)
+    rounds = count // len(objs)
+    with timed("read time per access", count):
+        for _ in range(rounds):
+            for obj in objs:
+                obj.prop1
+    with timed("write time per access", count):
+        for _ in range(rounds):
+            for obj in objs:
+                obj.prop1 = 1
+    objs = columnar.read_all(BaseSet)
+    with timed("columnar read time per access", count):
+        for _ in range(rounds):
+            for obj in objs:
+                obj.prop1
+    objs = make_objs(1000)
+    with timed("unattached read time per access", count):
+        for _ in range(rounds):
+            for obj in objs:
+                obj.prop3
+
+
+@microbenchmark("proxy")
+def proxy(count=OBJ_COUNT):
+    for style, tp in [("dict", BaseSet), ("slots", SlotBaseSet)]:
+        df = Dataframe("BENCH_PROXY", [tp])
+        df.add_many(tp, make_objs(count, tp))
+        df.commit()
+        child = child_of(df, "BENCH_PROXY_CHILD", [tp])
+        with timed("{0} first read_all per object".format(style), count):
+            objs = child.read_all(tp)
+        del objs
+        child.local_heap.tracked_objs[tp.__r_meta__.name].clear()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        objs = child.read_all(tp)
+        for obj in objs:
+            obj.prop1
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        report(
+            "{0} proxy bytes per object".format(style),
+            (after - before) / count, "B")
+
+
+@microbenchmark("view")
+def view(count=OBJ_COUNT):
+    df = Dataframe("BENCH_VIEW", [BaseSet])
+    df.add_many(BaseSet, make_objs(count))
+    df.commit()
+    for take in ["read_all", "view"]:
+        child = child_of(df, "BENCH_VIEW_CHILD", [BaseSet])
+        with timed("{0} len + first 100 objects".format(take), unit="ms"):
+            objs = getattr(child, take)(BaseSet)
+            len(objs)
+            for obj, _ in zip(objs, range(100)):
+                obj.prop1
+
+
+@microbenchmark("foreignkey")
+def foreignkey(count=OBJ_COUNT):
+    df = Dataframe("BENCH_FK", [BaseSet, Owner])
+    bases = make_objs(count)
+    df.add_many(BaseSet, bases)
+    df.add_many(Owner, [Owner(i, base) for i, base in enumerate(bases)])
+    df.commit()
+    for name in ["attribute", "resolve", "prefetch"]:
+        child = child_of(df, "BENCH_FK_CHILD", [BaseSet, Owner])
+        owners = child.read_all(Owner)
+        with timed("{0} first walk per object".format(name), count):
+            if name == "resolve":
+                refs = child.resolve(Owner, owners, "base")
+            else:
+                if name == "prefetch":
+                    child.prefetch(Owner, owners)
+                refs = [owner.base for owner in owners]
+            sum(ref.prop1 for ref in refs)
+        with timed("{0} second walk per object".format(name), count):
+            sum(owner.base.prop1 for owner in owners)
+
+
+@microbenchmark("resident")
+def resident(count=3 * KEEP_PROXIES):
+    # Every object is read once and dropped, as a long running node does
+    # over time. Only the last KEEP_PROXIES proxies should stay.
+    parent = Dataframe("BENCH_RESIDENT_PARENT", [BaseSet])
+    parent.add_many(BaseSet, make_objs(count))
+    parent.commit()
+    child = Dataframe(
+        "BENCH_RESIDENT_CHILD", [BaseSet], details=parent.details)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for oid in range(count):
+        child.read_one(BaseSet, oid).prop1
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    counts = child.resident(BaseSet)
+    report("resident proxies", counts["proxies"], "")
+    report("resident table rows", counts["table_rows"], "")
+    report("retained bytes per object read", (after - before) / count, "B")
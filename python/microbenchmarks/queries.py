@@ -0,0 +1,168 @@
+import numpy as np
+
+from rtypes import pcc_set, primarykey, dimension, subset, predicate, grid
+from spacetime import Dataframe
+from microbenchmarks.common import (
+    microbenchmark, BaseSet, Owner, OBJ_COUNT, make_objs, child_of, timed)
+
+
+@subset(BaseSet)
+class LowSet(object):
+    @predicate(BaseSet.prop1)
+    def pred_func(prop1):
+        return prop1 <= 1000
+
+
+@subset(BaseSet)
+class VectorLowSet(object):
+    @predicate(BaseSet.prop1, vectorized=True)
+    def pred_func(prop1):
+        return prop1 <= 1000
+
+
+@pcc_set
+class Keyed(object):
+    oid = primarykey(int)
+    key = dimension(int, index=True)
+    value = dimension(int)
+    rank = dimension(float, ordered=True)
+
+    def __init__(self, oid, key):
+        self.oid = oid
+        self.key = key
+        self.value = key
+        self.rank = float(oid)
+
+
+@pcc_set
+class Particle(object):
+    oid = primarykey(int)
+    x = dimension(float)
+    y = dimension(float)
+    position = grid("x", "y", cell_size=10.0)
+
+    def __init__(self, oid, x, y):
+        self.oid = oid
+        self.x = x
+        self.y = y
+
+
+@microbenchmark("subset")
+def subset_read(count=OBJ_COUNT):
+    df = Dataframe("BENCH_SUBSET", [BaseSet, LowSet])
+    with timed("add_many per object", count):
+        df.add_many(BaseSet, make_objs(count))
+    df.commit()
+    with timed("filter read_all(BaseSet)", unit="ms"):
+        [obj for obj in df.read_all(BaseSet) if obj.prop1 <= 1000]
+    with timed("read_all(LowSet)", unit="ms"):
+        df.read_all(LowSet)
+    objs = df.read_all(BaseSet)[:1000]
+    with timed("write to other dim per object", len(objs)):
+        for obj in objs:
+            obj.prop2 = "a"
+    with timed("write to predicate dim per object", len(objs)):
+        for obj in objs:
+            obj.prop1 = 0
+
+
+@microbenchmark("vectorized_subset")
+def vectorized_subset(count=OBJ_COUNT):
+    source = Dataframe("BENCH_VECTORIZED_SOURCE", [BaseSet])
+    source.add_many(BaseSet, make_objs(count))
+    source.commit()
+    for tp in [LowSet, VectorLowSet]:
+        df = Dataframe(
+            "BENCH_VECTORIZED_{0}".format(tp.__name__), [BaseSet, tp])
+        df.add_many(BaseSet, make_objs(count))
+        subset_index = df.local_heap.subsets[tp.__r_meta__.name]
+        oids = list(subset_index.heap.data[subset_index.storage])
+        with timed("{0} membership".format(tp.__name__), unit="ms"):
+            subset_index.update_many(oids)
+        with timed("{0} pull".format(tp.__name__), unit="ms"):
+            Dataframe(
+                "BENCH_VECTORIZED_CHILD_{0}".format(tp.__name__), [tp],
+                details=source.details)
+
+
+@microbenchmark("join")
+def join(count=OBJ_COUNT):
+    df = Dataframe("BENCH_JOIN", [BaseSet, Owner])
+    bases = make_objs(count)
+    df.add_many(BaseSet, bases)
+    df.add_many(Owner, [Owner(i, base) for i, base in enumerate(bases)])
+    df.commit()
+    child = child_of(df, "BENCH_JOIN_CHILD", [BaseSet, Owner])
+    with timed("nested loop per pair", count):
+        [(owner, child.read_one(BaseSet, owner.base.oid))
+         for owner in child.read_all(Owner)]
+    child = child_of(df, "BENCH_JOIN_CHILD", [BaseSet, Owner])
+    with timed("join per pair", count):
+        child.join(Owner, Owner.base, BaseSet)
+
+
+@microbenchmark("aggregate")
+def aggregate(count=OBJ_COUNT):
+    df = Dataframe("BENCH_AGGREGATE", [BaseSet])
+    df.add_many(BaseSet, make_objs(count))
+    objs = df.read_all(BaseSet)
+    with timed("sum over read_all", unit="ms"):
+        sum(obj.prop1 for obj in objs)
+    with timed("first read_aggregate", unit="ms"):
+        df.read_aggregate(BaseSet, "sum", "prop1")
+    with timed("read_aggregate", 1000):
+        for _ in range(1000):
+            df.read_aggregate(BaseSet, "sum", "prop1")
+    for dimname, value in [("prop3", 0.0), ("prop1", 0)]:
+        with timed("write to {0} per object".format(dimname), 1000):
+            for obj in objs[:1000]:
+                setattr(obj, dimname, value)
+
+
+@microbenchmark("spatial")
+def spatial(count=OBJ_COUNT):
+    # count particles on a 1000 x 1000 square.
+    df = Dataframe("BENCH_SPATIAL", [Particle])
+    points = np.random.RandomState(0).rand(count, 2) * 1000
+    df.add_many(Particle, [
+        Particle(i, float(x), float(y)) for i, (x, y) in enumerate(points)])
+    objs = df.read_all(Particle)
+    with timed("scan for radius 20 per query", 10, "ms"):
+        for i in range(10):
+            [obj for obj in objs
+             if (obj.x - i * 100) ** 2 + (obj.y - 500) ** 2 <= 400]
+    with timed("read_near radius 20 per query", 10, "ms"):
+        for i in range(10):
+            df.read_near(Particle, (i * 100, 500), 20)
+    with timed("move per object", 1000):
+        for obj in objs[:1000]:
+            obj.x += 1.0
+
+
+@microbenchmark("read_by")
+def read_by(count=OBJ_COUNT):
+    df = Dataframe("BENCH_READ_BY", [Keyed])
+    df.add_many(Keyed, [Keyed(i, i % 1000) for i in range(count)])
+    for dimname in ["key", "value"]:
+        with timed("read_by {0} per lookup".format(dimname), 10, "ms"):
+            for i in range(10):
+                df.read_by(Keyed, dimname, i)
+
+
+@microbenchmark("read_range")
+def read_range(count=OBJ_COUNT):
+    df = Dataframe("BENCH_READ_RANGE", [Keyed])
+    df.add_many(Keyed, [Keyed(i, i % 1000) for i in range(count)])
+    for dimname in ["rank", "value"]:
+        with timed("read_range {0} per query".format(dimname), 10, "ms"):
+            for i in range(10):
+                df.read_range(Keyed, dimname, i * 1000, i * 1000 + 99)
+        with timed("read_top {0} per query".format(dimname), 10, "ms"):
+            for i in range(10):
+                df.read_top(Keyed, dimname, 10)
+    objs = df.read_all(Keyed)[:1000]
+    for dimname in ["value", "rank"]:
+        values = [-getattr(obj, dimname) for obj in objs]
+        with timed("{0} write per object".format(dimname), len(objs)):
+            for obj, value in zip(objs, values):
+                setattr(obj, dimname, value)
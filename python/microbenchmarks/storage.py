@@ -0,0 +1,107 @@
+import tracemalloc
+
+import cbor
+import numpy as np
+
+from rtypes import pcc_set, primarykey, dimension
+from spacetime import Dataframe
+from spacetime.utils.enums import HeapStyle
+from microbenchmarks.common import (
+    microbenchmark, BaseSet, OBJ_COUNT, make_objs, report, timed)
+
+HEAPS = [("row", HeapStyle.Row), ("columnar", HeapStyle.Columnar)]
+
+
+@pcc_set
+class Sensor(object):
+    oid = primarykey(int)
+    reading = dimension(np.ndarray)
+
+    def __init__(self, oid, reading):
+        self.oid = oid
+        self.reading = reading
+
+
+@microbenchmark("encoding")
+def encoding(count=OBJ_COUNT):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    df = Dataframe("BENCH_ENCODING", [BaseSet])
+    objs = make_objs(count)
+    df.add_many(BaseSet, objs)
+    del objs
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    report("heap + diff bytes per object", (after - before) / count, "B")
+    with timed("commit time per object", count):
+        df.commit()
+    data, _ = df.versioned_heap.retrieve_data("BENCH", "ROOT")
+    report("wire bytes per object", len(cbor.dumps(data)) / count, "B")
+
+
+@microbenchmark("heap")
+def heap(count=OBJ_COUNT):
+    for style, heap_as in HEAPS:
+        df = Dataframe("BENCH_HEAP", [BaseSet], heap_as=heap_as)
+        df.add_many(BaseSet, make_objs(count))
+        df.commit()
+        data, version = df.versioned_heap.retrieve_data("BENCH", "ROOT")
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        child = Dataframe("BENCH_HEAP_CHILD", [BaseSet], heap_as=heap_as)
+        child.local_heap.receive_data(data, version)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        report(
+            "{0} heap bytes per object".format(style),
+            (after - before) / count, "B")
+        objs = child.read_all(BaseSet)
+        with timed("{0} scan time per object".format(style), count):
+            sum(obj.prop1 for obj in objs)
+
+
+@microbenchmark("column")
+def column(count=OBJ_COUNT):
+    for style, heap_as in HEAPS:
+        df = Dataframe("BENCH_COLUMN", [BaseSet], heap_as=heap_as)
+        df.add_many(BaseSet, make_objs(count))
+        df.commit()
+        with timed("{0} read_all sum per object".format(style), count):
+            sum(obj.prop1 for obj in df.read_all(BaseSet))
+        with timed("{0} read_column sum per object".format(style), count):
+            df.read_column(BaseSet, "prop1")[1].sum()
+
+
+@microbenchmark("write_column")
+def write_column(count=OBJ_COUNT):
+    for style, heap_as in HEAPS:
+        df = Dataframe("BENCH_WRITE_COLUMN", [BaseSet], heap_as=heap_as)
+        df.add_many(BaseSet, make_objs(count))
+        df.commit()
+        objs = df.read_all(BaseSet)
+        with timed("{0} attribute update per object".format(style), count):
+            for obj in objs:
+                obj.prop1 += 1
+        df.commit()
+        with timed("{0} update_where per object".format(style), count):
+            df.update_where(
+                BaseSet, "prop1", lambda cols: cols["prop1"] + 1)
+
+
+@microbenchmark("ndarray")
+def ndarray(count=1000):
+    # ~1 MB float64 arrays.
+    df = Dataframe("BENCH_NDARRAY", [Sensor])
+    reading = np.random.rand(128, 1024)
+    sensor = Sensor(0, reading)
+    df.add_one(Sensor, sensor)
+    with timed("read time per access", count):
+        for _ in range(count):
+            sensor.reading
+    with timed("write time per access", count):
+        for _ in range(count):
+            sensor.reading = reading
+    child = Dataframe("BENCH_NDARRAY_CHILD", [Sensor], details=df.details)
+    df.commit()
+    with timed("pull time", unit="ms"):
+        child.pull()
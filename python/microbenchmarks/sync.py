@@ -0,0 +1,166 @@
+import threading
+import time
+import tracemalloc
+
+import cbor
+
+from spacetime import Dataframe
+from spacetime.utils.enums import HeapStyle, Event
+import spacetime.utils.utils as utils
+from microbenchmarks.common import (
+    microbenchmark, BaseSet, make_objs, report, timed)
+
+
+@microbenchmark("concurrent_reads")
+def concurrent_reads(count=10000, duration=1.0):
+    # Reader threads walk all objects while another thread pulls small
+    # deltas into the same dataframe. The busy threads only compute, they
+    # show what the GIL alone costs the pulling thread.
+    parent = Dataframe("BENCH_CONCURRENT_PARENT", [BaseSet])
+    parent.add_many(BaseSet, make_objs(count))
+    parent.commit()
+    child = Dataframe(
+        "BENCH_CONCURRENT_CHILD", [BaseSet], details=parent.details)
+    source = parent.read_all(BaseSet)[:10]
+    objs = child.read_all(BaseSet)
+    for readers, kind in [(1, "readers"), (4, "readers"), (4, "busy")]:
+        done = threading.Event()
+        reads = [0] * readers
+        pulls = [0]
+
+        def read(i):
+            while not done.is_set():
+                if kind == "busy":
+                    sum(range(len(objs)))
+                    continue
+                for obj in objs:
+                    obj.prop1
+                reads[i] += len(objs)
+
+        def pull():
+            while not done.is_set():
+                for obj in source:
+                    obj.prop1 += 1
+                parent.commit()
+                child.pull()
+                pulls[0] += 1
+
+        threads = [
+            threading.Thread(target=read, args=(i,)) for i in range(readers)]
+        threads.append(threading.Thread(target=pull))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        done.set()
+        for thread in threads:
+            thread.join()
+        if kind == "readers":
+            report(
+                "{0} readers, reads".format(readers),
+                sum(reads) / duration / 1e6, "M/s")
+        report(
+            "{0} {1}, pulls".format(readers, kind),
+            pulls[0] / duration, "/s")
+
+
+@microbenchmark("checkout")
+def checkout(rounds=100):
+    # Pulls of a three object delta into heaps of growing size. The
+    # fetch updates the version graph, the checkout the heap.
+    for count in [1000, 10000, 100000]:
+        for style, heap_as in [
+                ("row", HeapStyle.Row), ("columnar", HeapStyle.Columnar)]:
+            name = "{0} {1} objects".format(style, count)
+            parent = Dataframe(
+                "BENCH_CHECKOUT_PARENT_{0}_{1}".format(style, count),
+                [BaseSet])
+            parent.add_many(BaseSet, make_objs(count))
+            parent.commit()
+            child = Dataframe(
+                "BENCH_CHECKOUT_CHILD_{0}_{1}".format(style, count),
+                [BaseSet], details=parent.details, heap_as=heap_as)
+            source = parent.read_all(BaseSet)[:3]
+            fetch, apply = 0.0, 0.0
+            for _ in range(rounds):
+                for obj in source:
+                    obj.prop1 += 1
+                parent.commit()
+                start = time.perf_counter()
+                child.fetch()
+                middle = time.perf_counter()
+                child.checkout()
+                fetch += middle - start
+                apply += time.perf_counter() - middle
+            report(name + ", fetch", fetch * 1e3 / rounds, "ms")
+            report(name + ", checkout", apply * 1e3 / rounds, "ms")
+
+
+@microbenchmark("update")
+def update(count=1000, rounds=20):
+    # Same load as benchmarks/base_set/baseset_update.py, every object
+    # is changed in every round and carries a 1 KB string.
+    parent = Dataframe("BENCH_UPDATE_PARENT", [BaseSet])
+    parent.add_many(BaseSet, [
+        BaseSet(i, i, str(i), float(i), str(i) * 1000)
+        for i in range(count)])
+    parent.commit()
+    child = Dataframe(
+        "BENCH_UPDATE_CHILD", [BaseSet], details=parent.details)
+    objs = parent.read_all(BaseSet)
+    # Tracing slows the rounds down, so time and memory are apart.
+    for traced in [False, True]:
+        peak, elapsed = 0, 0.0
+        for _ in range(rounds):
+            for obj in objs:
+                obj.prop1 += 1
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            parent.commit()
+            child.pull()
+            elapsed += time.perf_counter() - start
+            if traced:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        if traced:
+            report("peak allocation per round", peak / 1e3, "KB")
+        else:
+            report(
+                "commit + pull time per round", elapsed * 1e3 / rounds, "ms")
+    # The merge that folds a delta into the full state.
+    tpname = BaseSet.__r_meta__.name
+    state, _ = parent.versioned_heap.retrieve_data("BENCH", "ROOT")
+    delta = {tpname: {
+        i: {"dims": {"prop1": i}, "types": {tpname: Event.Modification}}
+        for i in range(count)}}
+    with timed("merge time", unit="ms"):
+        utils.merge_state_delta(state, delta)
+    tracemalloc.start()
+    utils.merge_state_delta(state, delta)
+    report("merge allocation", tracemalloc.get_traced_memory()[1] / 1e3, "KB")
+    tracemalloc.stop()
+
+
+@microbenchmark("noop_writes")
+def noop_writes(count=1000, ticks=10):
+    # A controller that writes all of its state every tick. A tenth of
+    # the objects move, another tenth change a dim and change it back.
+    df = Dataframe("BENCH_NOOP_WRITES", [BaseSet])
+    df.add_many(BaseSet, make_objs(count))
+    df.commit()
+    objs = df.read_all(BaseSet)
+    size, records = 0, 0
+    for tick in range(ticks):
+        for i, obj in enumerate(objs):
+            obj.prop1 = obj.prop1 + (1 if i % 10 == tick else 0)
+            obj.prop2 = obj.prop2
+            obj.prop3 = obj.prop3 + 1.0
+            if i % 10 != (tick + 5) % 10:
+                obj.prop3 = obj.prop3 - 1.0
+            obj.prop4 = obj.prop4
+        size += len(cbor.dumps(df.local_heap.diff))
+        records += sum(len(changes) for changes in df.local_heap.diff.values())
+        df.commit()
+    report("changed objects per tick", count / 5, "")
+    report("delta records per tick", records / ticks, "")
+    report("delta bytes per tick", size / ticks / 1e3, "KB")
@@ -1,3 +1,4 @@
 from rtypes.types.pcc_set import pcc_set
 from rtypes.types.subset import subset
-from rtypes.attributes import dimension, primarykey, predicate
+from rtypes.types.projection import projection
+from rtypes.attributes import dimension, primarykey, predicate, grid
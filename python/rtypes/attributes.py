@@ -1,28 +1,50 @@
 class Dimension():
-    def __init__(self, dim_type, is_primary):
+    def __init__(self, dim_type, is_primary, index=False, ordered=False):
         self.dim_type = dim_type
         self.is_primary = is_primary
+        # Dataframes keep a hash index from value to oids.
+        self.index = index
+        # Dataframes keep the oids sorted by value.
+        self.ordered = ordered
+        # Specialized codec for dim_type, set when the type is decorated.
+        self.encode = None
+        self.decode = None
+
+
+class Grid():
+    '''A spatial index over two numeric dimensions, given by name, with
+       square cells of cell_size.'''
+    def __init__(self, xdim, ydim, cell_size):
+        self.xdim = xdim
+        self.ydim = ydim
+        self.cell_size = cell_size
 
 
 class PredicateFunction():
-    def __init__(self, func, dims):
+    def __init__(self, func, dims, vectorized=False):
         self.func = func
         self.dims = dims
+        # func can also take numpy arrays of the dims and return a mask.
+        self.vectorized = vectorized
 
     def __call__(self, *args):
         return self.func(*args)
 
 
-def dimension(dim_type):
-    return Dimension(dim_type, False)
+def dimension(dim_type, index=False, ordered=False):
+    return Dimension(dim_type, False, index=index, ordered=ordered)
+
+def grid(xdim, ydim, cell_size=1.0):
+    return Grid(xdim, ydim, cell_size)
 
 def primarykey(dim_type):
     return Dimension(dim_type, True)
 
 
 class predicate():
-    def __init__(self, *dims):
+    def __init__(self, *dims, vectorized=False):
         self.dims = dims
+        self.vectorized = vectorized
 
     def __call__(self, func):
-        return PredicateFunction(func, self.dims)
+        return PredicateFunction(func, self.dims, self.vectorized)
@@ -1,6 +1,7 @@
 from abc import ABCMeta
 
 from rtypes.type_graph import TypeManager
+from rtypes.utils.converter import get_object_codec
 
 class Metadata():
     __metaclass__ = ABCMeta
@@ -8,6 +9,11 @@ class Metadata():
     def name_chain(self):
         return self.type_graph.name_chain[self.name]
 
+    @property
+    def root(self):
+        '''The pcc_set that stores the objects of this type.'''
+        return self.type_graph.root.cls
+
     def __init__(self, rtype, cls):
         self.cls = cls
         self.name = "{0}.{1}".format(cls.__module__, cls.__name__)
@@ -16,10 +22,12 @@ class Metadata():
 
 
 class SetMetadata(Metadata):
-    def __init__(self, rtype, cls, dims, dimmap):
+    def __init__(self, rtype, cls, dims, dimmap, grids=()):
         super().__init__(rtype, cls)
         self.dimnames = dims
         self.dimmap = dimmap
+        self.grids = list(grids)
+        self.encode_obj, self.decode_obj = get_object_codec(dimmap)
         self.type_graph = TypeManager(self)
 
 
@@ -29,7 +37,22 @@ class SubsetMetadata(Metadata):
         parent_meta = parent_cls.__r_meta__
         self.dimnames = parent_meta.dimnames
         self.dimmap = parent_meta.dimmap
+        self.encode_obj = parent_meta.encode_obj
+        self.decode_obj = parent_meta.decode_obj
         self.parent = parent_meta
         self.pred_func = pred_func
         self.type_graph = parent_meta.type_graph
-        self.type_graph.add_subset(self, self.parent)
+        self.type_graph.add_dependent(self, self.parent)
+
+
+class ProjectionMetadata(Metadata):
+    def __init__(self, rtype, cls, parent_cls, dimnames):
+        super().__init__(rtype, cls)
+        parent_meta = parent_cls.__r_meta__
+        self.dimnames = dimnames
+        self.dimmap = {
+            dimname: parent_meta.dimmap[dimname] for dimname in dimnames}
+        self.encode_obj, self.decode_obj = get_object_codec(self.dimmap)
+        self.parent = parent_meta
+        self.type_graph = parent_meta.type_graph
+        self.type_graph.add_dependent(self, self.parent)
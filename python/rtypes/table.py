@@ -1,5 +1,4 @@
 from uuid import uuid4
-from rtypes.utils.converter import convert, unconvert
 
 
 class RtypesTable(object):
@@ -24,12 +23,12 @@ class RtypesTable(object):
             oid = str(uuid4())
             self.object_table[oid] = dict()
 
-        converted = convert(dim_obj.dim_type, value)
+        converted = dim_obj.encode(value)
         if oid in self.store_as_temp:
             self.store_as_temp[oid][dimname] = converted
         else:
             # Write to local state map.
-            self.object_table[oid][dimname] = convert(dim_obj.dim_type, value)
+            self.object_table[oid][dimname] = converted
         return oid
 
     def set_primarykey(self, oid, dimname, dim_obj, value):
@@ -44,33 +43,30 @@ class RtypesTable(object):
             
         if oid is not None:
             # Oid is being reset, but the object is not controlled by the dataframe.
-            self.object_table[oid][dimname] = convert(dim_obj.dim_type, value)
+            self.object_table[oid][dimname] = dim_obj.encode(value)
             self.object_table[value] = self.object_table[oid]
             del self.object_table[oid]
         else:
             # oid is being assigned for the first time.
             self.object_table[value] = dict()
-            self.object_table[value][dimname] = convert(dim_obj.dim_type, value)
+            self.object_table[value][dimname] = dim_obj.encode(value)
         return value
 
 
     def get(self, oid, dimname, dim_obj):
         if oid in self.store_as_temp and dimname in self.store_as_temp[oid]:
-            return unconvert(self.store_as_temp[oid][dimname], dim_obj.dim_type)
-        if oid not in self.object_table and dimname not in self.object_table[oid]:
+            return dim_obj.decode(self.store_as_temp[oid][dimname])
+        if oid not in self.object_table or dimname not in self.object_table[oid]:
             # Value has not been assigned.
             raise AttributeError("{0} has not been assigned a value.".format(dimname))
         # return value from local table.
         
-        return unconvert(self.object_table[oid][dimname], dim_obj.dim_type)
+        return dim_obj.decode(self.object_table[oid][dimname])
 
     def delete_obj(self, oid):
         if oid in self.object_table:
             del self.object_table[oid]
 
     def take_control(self, obj):
-        oid = obj.__r_oid__
-        self.object_table[oid] = dict()
-        for dimname, dim_obj in self.obj_type.__r_meta__.dimmap.items():
-            if hasattr(obj, dimname):
-                self.object_table[oid][dimname] = convert(dim_obj.dim_type, getattr(obj, dimname))
+        self.object_table[obj.__r_oid__] = (
+            self.obj_type.__r_meta__.encode_obj(obj))
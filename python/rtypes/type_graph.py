@@ -11,7 +11,7 @@ class TypeManager():
             root_meta.name: [root_meta.name]
         }
 
-    def add_subset(self, tp_meta, parent_meta):
+    def add_dependent(self, tp_meta, parent_meta):
         self.dependents[parent_meta].append(tp_meta)
         self.dependents[tp_meta] = list()
         self.name_chain[tp_meta.name] = (
@@ -1,66 +1,107 @@
-from rtypes.attributes import Dimension
+from rtypes.attributes import Dimension, Grid
 from rtypes.metadata import SetMetadata
 from rtypes.utils.enums import Rtype
-from rtypes.utils.converter import convert, unconvert
+from rtypes.utils.converter import get_codec
 from rtypes.table import RtypesTable
 
-def get_property(dimname, dim_obj):
-    @property
-    def prop(self):
-        cls = type(self)
-        oid = self.__r_oid__ if hasattr(self, "__r_oid__") else None
-        if hasattr(self, "__r_df__") and self.__r_df__ is not None:
-            return unconvert(
-                self.__r_df__.read_dimension(
-                    cls, oid, dimname), dim_obj.dim_type, self.__r_df__)
-        if hasattr(self, "__r_temp__") and self.__r_temp__ is not None:
-            return unconvert(self.__r_temp__[dimname], dim_obj.dim_type)
-        return cls.__r_table__.get(oid, dimname, dim_obj)
+# Reads tried without the heap lock before a read takes it.
+OPTIMISTIC_READS = 3
 
-    @prop.setter
-    def prop(self, value):
-        cls = type(self)
-        oid = self.__r_oid__ if hasattr(self, "__r_oid__") else None
-        df_attached = hasattr(self, "__r_df__") and self.__r_df__ is not None
+class DimensionProperty(object):
+    '''Descriptor of a pcc_set dimension. An object is either attached
+       to a dataframe heap, bound to a temp dict during a merge, or
+       stored in the type's table. Attached objects cache their heap
+       record with the heap epoch, so a read is a lookup in the record
+       until the heap changes its layout. owner is the pcc_set the
+       dimension belongs to, subsets share its descriptors.
+       The heap sets its epoch to None while it moves records, a read
+       that overlaps that is done again, and with the heap lock if the
+       records keep moving. Each read is consistent on its own, two
+       reads of one object can still straddle a checkout.'''
+    __slots__ = ("owner", "dimname", "dim_obj", "encode", "decode")
+
+    def __init__(self, owner, dimname, dim_obj):
+        self.owner = owner
+        self.dimname = dimname
+        self.dim_obj = dim_obj
+        self.encode = dim_obj.encode
+        self.decode = dim_obj.decode
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+        df = getattr(obj, "__r_df__", None)
+        if df is not None:
+            for _ in range(OPTIMISTIC_READS):
+                epoch = df.epoch
+                try:
+                    cached_epoch, record = obj.__r_record__
+                except AttributeError:
+                    cached_epoch = None
+                if epoch is None or cached_epoch is not epoch:
+                    record = df.get_record(self.owner, obj.__r_oid__)
+                    obj.__r_record__ = (epoch, record)
+                value = record.get(self.dimname)
+                if df.epoch is epoch:
+                    return self.decode(value, df)
+            return self.decode(df.read_dimension(
+                self.owner, obj.__r_oid__, self.dimname), df)
+        temp = getattr(obj, "__r_temp__", None)
+        if temp is not None:
+            return self.decode(temp[self.dimname])
+        return self.owner.__r_table__.get(
+            getattr(obj, "__r_oid__", None), self.dimname, self.dim_obj)
+
+    def __set__(self, obj, value):
+        cls = self.owner
+        dimname, dim_obj, encode = self.dimname, self.dim_obj, self.encode
+        oid = getattr(obj, "__r_oid__", None)
+        df = getattr(obj, "__r_df__", None)
         if dim_obj.is_primary:
-            if df_attached:
-                self.__r_df__.reset_primary_key(
-                    cls, oid, dimname, convert(dim_obj.dim_type, value))
+            if df is not None:
+                df.reset_primary_key(cls, oid, dimname, encode(value))
             else:
                 cls.__r_table__.set_primarykey(
                     oid, dimname, dim_obj, value)
-            self.__r_oid__ = value
+            obj.__r_oid__ = value
         else:
-            if df_attached:
+            if df is not None:
                 if oid is None:
                     raise RuntimeError(
                         "Objhect primarykey has not been"
                         " set but dataframe is attached.")
-                self.__r_df__.write_dimension(
-                    cls, oid, dimname, convert(dim_obj.dim_type, value))
+                df.write_dimension(cls, oid, dimname, encode(value))
             else:
-                self.__r_oid__ = cls.__r_table__.set(
+                obj.__r_oid__ = cls.__r_table__.set(
                     oid, dimname, dim_obj, value)
-        if hasattr(self, "__r_temp__") and self.__r_temp__ is not None:
-            self.__r_temp__[dimname] = convert(dim_obj.dim_type, value)
+        if getattr(obj, "__r_temp__", None) is not None:
+            obj.__r_temp__[dimname] = encode(value)
 
-    return prop
 
 def set_dimension(cls, dim):
     dim_obj = getattr(cls, dim)
-    setattr(cls, dim, get_property(dim, dim_obj))
+    dim_obj.encode, dim_obj.decode = get_codec(dim_obj.dim_type)
+    setattr(cls, dim, DimensionProperty(cls, dim, dim_obj))
     return dim_obj
 
 def set_metadata(cls):
     cls.__r_table__ = RtypesTable(cls)
     dims = list()
+    grids = list()
     for attr in dir(cls):
         if isinstance(getattr(cls, attr), Dimension):
             dims.append(attr)
+        elif isinstance(getattr(cls, attr), Grid):
+            grids.append(getattr(cls, attr))
 
     dimmap = {dim: set_dimension(cls, dim) for dim in dims}
+    for grid in grids:
+        if grid.xdim not in dimmap or grid.ydim not in dimmap:
+            raise TypeError(
+                "Grid over ({0}, {1}) needs both to be dimensions.".format(
+                    grid.xdim, grid.ydim))
 
-    meta = SetMetadata(Rtype.SET, cls, dims, dimmap)
+    meta = SetMetadata(Rtype.SET, cls, dims, dimmap, grids=grids)
     if hasattr(cls, "__r_meta__"):
         raise TypeError("How is this possible?")
     else:
@@ -71,10 +112,52 @@ def delete_obj(cls):
     def deleter(self):
         if not hasattr(self, "__r_oid__"):
             return
+        if getattr(self, "__r_df__", None) is not None:
+            # Objects in a dataframe have no row, the heap holds the dims.
+            return
         oid = self.__r_oid__
         cls.__r_table__.delete_obj(oid)
     return deleter
     
+# State that spacetime keeps on every object of a pcc_set.
+RTYPES_SLOTS = ("__r_oid__", "__r_df__", "__r_temp__", "__r_record__")
+
+def rebind_class_cell(value, old_cls, new_cls):
+    # Zero-arg super() reads the class from the __class__ cell of the
+    # function, which still points at the class that was rebuilt.
+    if isinstance(value, (staticmethod, classmethod)):
+        value = value.__func__
+    if isinstance(value, property):
+        for func in (value.fget, value.fset, value.fdel):
+            rebind_class_cell(func, old_cls, new_cls)
+        return
+    code = getattr(value, "__code__", None)
+    if code is None or not value.__closure__:
+        return
+    for name, cell in zip(code.co_freevars, value.__closure__):
+        if name == "__class__" and cell.cell_contents is old_cls:
+            cell.cell_contents = new_cls
+
+def add_slots(cls):
+    '''Rebuilds a class that declares __slots__ with the rtypes state
+       added to the slots, so that its objects carry no __dict__.'''
+    slots = cls.__dict__["__slots__"]
+    slots = (slots,) if isinstance(slots, str) else tuple(slots)
+    slots += tuple(slot for slot in RTYPES_SLOTS if slot not in slots)
+    if not cls.__weakrefoffset__:
+        slots += ("__weakref__",)
+    namespace = {
+        attr: value for attr, value in cls.__dict__.items()
+        if attr not in slots and attr not in ("__dict__", "__weakref__")}
+    namespace["__slots__"] = slots
+    new_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    new_cls.__qualname__ = cls.__qualname__
+    for value in namespace.values():
+        rebind_class_cell(value, cls, new_cls)
+    return new_cls
+
 def pcc_set(cls):
+    if "__slots__" in cls.__dict__:
+        cls = add_slots(cls)
     set_metadata(cls)
     return cls
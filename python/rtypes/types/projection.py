@@ -0,0 +1,30 @@
+from rtypes.metadata import ProjectionMetadata
+from rtypes.utils.enums import Rtype
+
+def set_metadata(cls, parent, dims):
+    if parent.__r_meta__.rtype is not Rtype.SET:
+        raise TypeError("Only a pcc_set can be projected.")
+    cls.__r_table__ = parent.__r_table__
+    dimnames = [dim.dimname for dim in dims]
+    # The primary key is always part of the projection.
+    for dimname, dim_obj in parent.__r_meta__.dimmap.items():
+        if dim_obj.is_primary and dimname not in dimnames:
+            dimnames.insert(0, dimname)
+    # Objects of the projection read and write the dimensions of the parent.
+    for dimname in dimnames:
+        setattr(cls, dimname, getattr(parent, dimname))
+    cls.__r_meta__ = ProjectionMetadata(
+        Rtype.PROJECTION, cls, parent, dimnames)
+
+
+class projection(object):
+    '''Declares cls as a view of some dimensions of a pcc_set. Dataframes
+       that only declare the projection pull and store only those
+       dimensions.'''
+    def __init__(self, parent_cls, *dims):
+        self.parent = parent_cls
+        self.dims = dims
+
+    def __call__(self, cls):
+        set_metadata(cls, self.parent, self.dims)
+        return cls
@@ -9,6 +9,9 @@ def set_metadata(cls, parent):
         if isinstance(getattr(cls, attr), PredicateFunction):
             pred_func = getattr(cls, attr)
 
+    # Objects of the subset read and write the dimensions of the parent.
+    for dimname in parent.__r_meta__.dimnames:
+        setattr(cls, dimname, getattr(parent, dimname))
     meta = SubsetMetadata(Rtype.SUBSET, cls, parent, pred_func)
     if hasattr(cls, "__r_meta__"):
         TypeError("How am I here?")
@@ -1,5 +1,4 @@
 from rtypes.utils.enums import Datatype
-from pickle import loads, dumps
 
 try:
     import numpy as np
@@ -7,96 +6,241 @@ try:
 except ModuleNotFoundError:
     HASNUMPY = False
 
+# Values of the basic types are stored as is. Every other value is stored
+# as a list whose first element is the Datatype tag, followed by the payload:
+#   foreign key: [Datatype.FOREIGNKEY, oid]
+#   ndarray:     [Datatype.NPARRAY, buffer, shape, dtype descriptor]
+#   tuple/list:  [Datatype.TUPLE or Datatype.LIST, item1, item2, ...]
+# Lists are used instead of tuples as that is what comes back from cbor.
+BASIC_DIM_TYPES = (str, int, float, bool, bytes)
 
-class container(object):
-    pass
+# Dimension types that bulk reads return as numpy arrays.
+NUMERIC_DIM_TYPES = {int: "i8", float: "f8", bool: "?"}
+
+# dtype descriptor -> np.dtype, so that reads do not rebuild the dtype.
+DTYPE_CACHE = dict()
+
+
+def is_buffer_type(dim_type):
+    return HASNUMPY and (dim_type is np.ndarray or dim_type is np.array)
+
+def get_dtype(descr):
+    if isinstance(descr, str):
+        try:
+            return DTYPE_CACHE[descr]
+        except KeyError:
+            dtype = DTYPE_CACHE[descr] = np.dtype(descr)
+            return dtype
+    # Structured dtype, cbor turned the field tuples into lists.
+    return np.dtype([tuple(field) for field in descr])
+
+def is_shared(value):
+    '''True if the memory of the array can still be written through
+       something other than the array itself.'''
+    base = value.base
+    if base is None or isinstance(base, bytes):
+        return False
+    if isinstance(base, np.ndarray):
+        return base.flags.writeable or is_shared(base)
+    # A read only memoryview is trusted, received buffers are made so.
+    return not (isinstance(base, memoryview) and base.readonly)
+
+def convert_ndarray(value, inline=False):
+    if value.dtype.hasobject:
+        raise TypeError(
+            "ndarray dimensions cannot hold python objects, "
+            "dtype {0} is not supported.".format(value.dtype))
+    if inline:
+        # Nested arrays travel inside the cbor body, so they need bytes.
+        data = value.tobytes()
+    else:
+        # Read only arrays over memory nobody else writes, such as the
+        # ones the dataframe hands out, are stored as they are. Any other
+        # array is copied so that the app can keep writing to its own.
+        if (value.flags.writeable or not value.flags.c_contiguous
+                or is_shared(value)):
+            value = np.array(value, order="C")
+            value.flags.writeable = False
+        data = memoryview(value.reshape(-1).view(np.uint8)).toreadonly()
+    return [
+        Datatype.NPARRAY, data, list(value.shape),
+        value.dtype.descr if value.dtype.fields else value.dtype.str]
+
+def same_buffer(buffer, other):
+    '''True if both stored buffers are over the same memory. Comparing
+       their bytes costs as much as the write itself.'''
+    if buffer is other:
+        return True
+    if buffer.nbytes != other.nbytes:
+        return False
+    return (
+        np.frombuffer(buffer, dtype=np.uint8).__array_interface__["data"][0]
+        == np.frombuffer(other, dtype=np.uint8).__array_interface__["data"][0])
+
+def unconvert_ndarray(value):
+    if not HASNUMPY:
+        global np
+        import numpy as np
+    # Read only view over the stored buffer, no copy is made.
+    return np.frombuffer(value[1], dtype=get_dtype(value[3])).reshape(
+        value[2])
 
 def convert(dim_type, value):
-    if dim_type is str:
-        return {
-            "type": Datatype.STRING,
-            "value": value
-        }
-    if dim_type is int:
-        return {
-            "type": Datatype.INTEGER,
-            "value": value
-        }
-    if dim_type is float:
-        return {
-            "type": Datatype.FLOAT,
-            "value": value
-        }
-    if dim_type is bool:
-        return {
-            "type": Datatype.BOOLEAN,
-            "value": value
-        }
-    if dim_type is bytes:
-        return {
-            "type": Datatype.BYTES,
-            "value": value
-        }
-    if HASNUMPY and dim_type is np.array:
-        return {
-            "type": Datatype.NPARRAY,
-            "value": {
-                "data": value.tostring(),
-                "shape": value.shape,
-                "type": dumps(value.dtype)
-            }
-        }
-    if HASNUMPY and dim_type is np.ndarray:
-        return {
-            "type": Datatype.NPARRAY,
-            "value": {
-                "data": value.tostring(),
-                "shape": value.shape,
-                "type": dumps(value.dtype)
-            }
-        }
+    if value is None:
+        return None
+    if dim_type in BASIC_DIM_TYPES:
+        return value
+    if is_buffer_type(dim_type):
+        return convert_ndarray(value)
     if hasattr(dim_type, "__r_meta__") and dim_type.__r_meta__:
         # This is one of our own type. Make it a foreign key.
-        return {
-            "type": Datatype.FOREIGNKEY,
-            "value": value.__r_oid__
-        }
+        return [Datatype.FOREIGNKEY, value.__r_oid__]
     if dim_type is tuple:
-        return {
-            "type": Datatype.TUPLE,
-            "value": [convert(type(v), v) for v in value]
-        }
+        return [Datatype.TUPLE] + [convert_item(v) for v in value]
+    if dim_type is list:
+        return [Datatype.LIST] + [convert_item(v) for v in value]
+
+def convert_item(value):
+    if is_buffer_type(type(value)):
+        return convert_ndarray(value, inline=True)
+    return convert(type(value), value)
+
+def encode_basic(value):
+    return value
+
+def decode_basic(value, df=None):
+    return value
+
+def encode_ndarray(value):
+    return None if value is None else convert_ndarray(value)
+
+def decode_ndarray(value, df=None):
+    return None if value is None else unconvert_ndarray(value)
+
+def encode_tuple(value):
+    if value is None:
+        return None
+    return [Datatype.TUPLE] + [convert_item(v) for v in value]
+
+def decode_tuple(value, df=None):
+    if value is None:
+        return None
+    return tuple(unconvert(item, None, None) for item in value[1:])
+
+def encode_list(value):
+    if value is None:
+        return None
+    return [Datatype.LIST] + [convert_item(v) for v in value]
+
+def decode_list(value, df=None):
+    if value is None:
+        return None
+    return list(unconvert(item, None, None) for item in value[1:])
+
+def get_foreignkey_codec(dim_type):
+    def encode_foreignkey(value):
+        return None if value is None else [
+            Datatype.FOREIGNKEY, value.__r_oid__]
+
+    def decode_foreignkey(value, df=None):
+        if value is None:
+            return None
+        obj = df.read_one(dim_type, value[1]) if df else None
+        if not obj:
+            obj = object.__new__(dim_type)
+            obj.__r_oid__ = value[1]
+        return obj
+    return encode_foreignkey, decode_foreignkey
+
+def get_codec(dim_type):
+    '''Returns the (encode, decode) pair specialized for dim_type, so that
+       reads and writes of a dimension do not dispatch on the type.'''
+    if dim_type in BASIC_DIM_TYPES:
+        return encode_basic, decode_basic
+    if is_buffer_type(dim_type):
+        return encode_ndarray, decode_ndarray
+    if hasattr(dim_type, "__r_meta__") and dim_type.__r_meta__:
+        return get_foreignkey_codec(dim_type)
+    if dim_type is tuple:
+        return encode_tuple, decode_tuple
     if dim_type is list:
+        return encode_list, decode_list
+    return (
+        lambda value: convert(dim_type, value),
+        lambda value, df=None: unconvert(value, dim_type, df))
+
+def get_object_codec(dimmap):
+    '''Returns the (encode, decode) pair for all dimensions of an object.
+       encode reads the set dimensions of an object into a dim map, decode
+       turns a dim map back into a map of values.'''
+    encoders = [
+        (dimname, dim_obj.encode) for dimname, dim_obj in dimmap.items()]
+    decoders = {
+        dimname: dim_obj.decode for dimname, dim_obj in dimmap.items()}
+
+    def encode_obj(obj):
+        dim_map = dict()
+        for dimname, encode in encoders:
+            try:
+                dim_map[dimname] = encode(getattr(obj, dimname))
+            except AttributeError:
+                # Value has not been assigned.
+                continue
+        return dim_map
+
+    def decode_obj(dim_map, df=None):
         return {
-            "type": Datatype.LIST,
-            "value": [convert(type(v), v) for v in value]
-        }
+            dimname: decoders[dimname](value, df)
+            for dimname, value in dim_map.items() if dimname in decoders}
+    return encode_obj, decode_obj
+
+def encode_column(dim_obj, values):
+    '''Encodes the values of one dimension for many objects.'''
+    if (HASNUMPY and isinstance(values, np.ndarray)
+            and not is_buffer_type(dim_obj.dim_type)):
+        # Numpy scalars cannot be sent, turn them into python values.
+        values = values.tolist()
+    if dim_obj.encode is encode_basic:
+        return list(values)
+    encode = dim_obj.encode
+    return [encode(value) for value in values]
+
+def decode_column(dim_obj, values, df=None):
+    '''Decodes the stored values of one dimension for many objects.
+       Numeric dimensions become a numpy array when numpy is available
+       and no value is missing, everything else a list.'''
+    if (HASNUMPY and dim_obj.dim_type in NUMERIC_DIM_TYPES
+            and not (type(values) is list and None in values)):
+        try:
+            return np.array(
+                values, dtype=NUMERIC_DIM_TYPES[dim_obj.dim_type])
+        except OverflowError:
+            pass
+    if dim_obj.decode is decode_basic:
+        return list(values)
+    decode = dim_obj.decode
+    return [decode(value, df) for value in values]
 
 def unconvert(value, dim_type, df=None):
     if value is None:
         return None
-    if value["type"] in Datatype.BASICTYPES:
-        return value["value"]
-    if value["type"] == Datatype.NPARRAY:
-        if not HASNUMPY:
-            global np
-            import numpy as np
-        return np.frombuffer(
-            value["value"]["data"],
-            dtype=loads(
-                value["value"]["type"])).reshape(value["value"]["shape"])
-        
-    if value["type"] == Datatype.FOREIGNKEY:
+    if type(value) is not list:
+        # Basic types are stored untagged.
+        return value
+    tag = value[0]
+    if tag == Datatype.NPARRAY:
+        return unconvert_ndarray(value)
+
+    if tag == Datatype.FOREIGNKEY:
         obj = None
         if df:
-            obj = df.read_one(dim_type, value["value"])
+            obj = df.read_one(dim_type, value[1])
         if not obj:
-            obj = container()
-            obj.__r_oid__ = value["value"]
-            obj.__class__ = dim_type
+            obj = object.__new__(dim_type)
+            obj.__r_oid__ = value[1]
         return obj
-    if value["type"] == Datatype.TUPLE:
-        return tuple(unconvert(item, None, None) for item in value["value"])
-    if value["type"] == Datatype.LIST:
-        return list(unconvert(item, None, None) for item in value["value"])
+    if tag == Datatype.TUPLE:
+        return tuple(unconvert(item, None, None) for item in value[1:])
+    if tag == Datatype.LIST:
+        return list(unconvert(item, None, None) for item in value[1:])
     return None
@@ -16,4 +16,5 @@ class Datatype(object):
 
 class Rtype(object):
     SET = "set"
-    SUBSET = "subset"
\ No newline at end of file
+    SUBSET = "subset"
+    PROJECTION = "projection"
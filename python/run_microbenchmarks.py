@@ -0,0 +1,8 @@
+import sys
+
+from microbenchmarks import BENCHMARKS
+
+if __name__ == "__main__":
+    for name in (sys.argv[1:] or sorted(BENCHMARKS)):
+        print(name)
+        BENCHMARKS[name]()
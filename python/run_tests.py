@@ -1,7 +1,19 @@
 from tests.test2 import *
 from tests.test_linked_list import *
 from tests.test_version_manager import *
-# from tests.test_subset import *
+from tests.test_converter import *
+from tests.test_columnar_heap import *
+from tests.test_columns import *
+from tests.test_record_cache import *
+from tests.test_subset import *
+from tests.test_indexes import *
+from tests.test_projection import *
+from tests.test_join import *
+from tests.test_aggregates import *
+from tests.test_change_feed import *
+from tests.test_concurrent_reads import *
+from tests.test_diff import *
+from tests.test_resident import *
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -8,6 +8,7 @@ from spacetime.managers.connectors.asyncio_socket_manager import AIOSocketServer
 from spacetime.managers.connectors.thread_socket_manager import TSocketServer, TSocketConnector
 from spacetime.managers.version_manager import VersionManager
 from spacetime.managers.managed_heap import ManagedHeap
+from spacetime.managers.columnar_heap import ColumnarHeap
 from spacetime.managers.diff import Diff
 import spacetime.utils.enums as enums
 import spacetime.utils.utils as utils
@@ -36,7 +37,7 @@ class Dataframe(object):
             connection_as=enums.ConnectionStyle.TSocket,
             instrument=None, dump_graph=None, resolver=None,
             autoresolve=enums.AutoResolve.FullResolve,
-            mem_instrument=False):
+            mem_instrument=False, heap_as=enums.HeapStyle.Row):
         self.appname = appname
         self.logger = utils.get_logger("%s_Dataframe" % appname)
         self.instrument = instrument
@@ -55,7 +56,7 @@ class Dataframe(object):
 
         self.graph_change_event = Condition()
         self.socket_server = SocketServer(
-            self.appname, server_port,
+            self.appname, server_port, types,
             self.fetch_call_back, self.push_call_back, self.confirm_fetch_req,
             self.instrument_record)
 
@@ -68,7 +69,12 @@ class Dataframe(object):
             tp.__r_meta__.name: tp for tp in self.types}
 
         # THis is the local snapshot.
-        self.local_heap = ManagedHeap(types)
+        if heap_as == enums.HeapStyle.Row:
+            self.local_heap = ManagedHeap(types)
+        elif heap_as == enums.HeapStyle.Columnar:
+            self.local_heap = ColumnarHeap(types)
+        else:
+            raise ValueError("Unknown heap_as {0}.".format(heap_as))
         self.versioned_heap = None
 
         # This is the dataframe's versioned graph.
@@ -133,6 +139,123 @@ class Dataframe(object):
            Returns empty list if no objects are found.'''
         return self.local_heap.read_all(dtype)
 
+    def read_by(self, dtype, dimname, value):
+        '''Returns a list of the objects of given type whose dimname
+           is value. Uses the hash index of the dimension if it was
+           declared with dimension(..., index=True), else scans.'''
+        return self.local_heap.read_by(dtype, dimname, value)
+
+    def read_range(self, dtype, dimname, lo=None, hi=None):
+        '''Returns the objects with lo <= dimname <= hi, in ascending
+           order of dimname. lo or hi can be None for an open end. Uses
+           the index of dimension(..., ordered=True), else sorts.'''
+        return self.local_heap.read_range(dtype, dimname, lo=lo, hi=hi)
+
+    def read_top(self, dtype, dimname, k):
+        '''Returns the k objects with the highest dimname, highest
+           first.'''
+        return self.local_heap.read_top(dtype, dimname, k)
+
+    def read_within(self, dtype, bbox, dims=None):
+        '''Returns the objects inside bbox, (xmin, ymin, xmax, ymax)
+           inclusive. dims is the (xdim, ydim) pair to search, it can be
+           left out when the type declares exactly one grid(...). Uses
+           the grid index, else scans.'''
+        return self.local_heap.read_within(dtype, bbox, dims=dims)
+
+    def read_near(self, dtype, point, radius, dims=None):
+        '''Returns the objects within radius of point (x, y), nearest
+           first. dims as in read_within.'''
+        return self.local_heap.read_near(dtype, point, radius, dims=dims)
+
+    def changes_since_last_checkout(self, dtype):
+        '''Returns (oid, event, dims) for each object of given type that
+           the last checkout changed. dims maps the changed dimensions
+           to their new values. For a subset, objects that joined or
+           left it come as New or Delete.'''
+        return self.local_heap.changes_since_last_checkout(dtype)
+
+    def on_change(self, dtype, callback):
+        '''Calls callback(changes) after every checkout that changes
+           objects of given type, changes as in
+           changes_since_last_checkout.'''
+        self.local_heap.on_change(dtype, callback)
+
+    def read_aggregate(self, dtype, func, dimname=None, group_by=None):
+        '''Returns func ("count", "sum", "min", "max" or "mean") of
+           dimname over the objects of given type, or a dict from each
+           value of group_by to it. Missing values are left out. The
+           aggregate is computed on the first read and kept up to date
+           with every change after, so later reads do not scan.'''
+        return self.local_heap.read_aggregate(
+            dtype, func, dimname=dimname, group_by=group_by)
+
+    def join(self, left, left_dim, right, right_dim=None):
+        '''Returns (l, r) pairs of objects of left and right under one
+           lock, as a hash join. Without right_dim, left_dim is a foreign
+           key and l refers to r, else l.left_dim == r.right_dim. Dims
+           can be given as names or as attributes (left.dim). Hash
+           indexes of the dimensions are used when they exist.'''
+        return self.local_heap.join(
+            left, getattr(left_dim, "dimname", left_dim),
+            right, getattr(right_dim, "dimname", right_dim))
+
+    def resident(self, dtype):
+        '''Returns {"proxies": n, "table_rows": m}, the proxies of the
+           type that the application still holds and the rows kept for
+           objects of the type that are not in a dataframe.'''
+        return self.local_heap.resident(dtype)
+
+    def resolve(self, dtype, objs, dimname):
+        '''Returns the objects referred to by the foreign key dimname
+           of each of objs, in the same order, under one lock.'''
+        return self.local_heap.resolve(dtype, objs, dimname)
+
+    def prefetch(self, dtype, objs, depth=1, dimnames=None):
+        '''Loads the objects reachable from objs over foreign keys, up
+           to depth hops, so that following the references later does
+           not go through the lock. dimnames limits the first hop.'''
+        self.local_heap.prefetch(dtype, objs, depth=depth, dimnames=dimnames)
+
+    def view(self, dtype):
+        '''Returns a lazy view of all objects of given type. It supports
+           len, in (objects or oids), indexing and iteration. Objects
+           are only made when they are touched. The view keeps the set
+           of objects, less the ones deleted since, not their values.'''
+        return self.local_heap.view(dtype)
+
+    def iter_all(self, dtype):
+        '''Iterates over all objects of given type, lazily.'''
+        return iter(self.local_heap.view(dtype))
+
+    def read_column(self, dtype, dimname):
+        '''Returns the oids of all objects of given type and
+           the values of dimname in the same order.'''
+        oids, columns = self.read_columns(dtype, [dimname])
+        return oids, columns[dimname]
+
+    def read_columns(self, dtype, dimnames):
+        '''Returns the oids of all objects of given type and a dict
+           of dimname -> values in the same order, read under one lock.
+           Numeric dimensions are numpy arrays, the rest are lists.
+           No objects are created for the read.'''
+        return self.local_heap.read_columns(dtype, dimnames)
+
+    def write_column(self, dtype, dimname, oids, values):
+        '''Sets dimname of the objects with the given oids to the
+           values in the same order, under one lock. Values can be a
+           numpy array.'''
+        self.local_heap.write_column(dtype, dimname, oids, values)
+
+    def update_where(
+            self, dtype, dimname, update, where=None, dimnames=None):
+        '''Column wise update of dimname. The columns in dimnames
+           (default [dimname]) are read as in read_columns. where(columns)
+           returns a mask of the objects to update, update(columns) the
+           new values for them. Returns the number of objects updated.'''
+        return self.local_heap.update_where(
+            dtype, dimname, update, where=where, dimnames=dimnames)
+
     def delete_one(self, dtype, obj):
         '''Deletes obj from staging first. If it exists
            in previous version, adds a delete record.'''
@@ -0,0 +1,202 @@
+from array import array
+
+from spacetime.managers.managed_heap import ManagedHeap
+from spacetime.utils.enums import Event
+
+# Dimension types that can be stored in a typed array.
+ARRAY_TYPECODES = {int: "q", float: "d"}
+
+
+class TypeColumns(object):
+    '''Objects of one type stored column wise. index maps oid -> row,
+       oids maps row -> oid, and each column holds one dimension by row.
+       Only dimnames get a column, all dims of dtype by default.
+       Removing an object moves the last row into its place, so rows are
+       not kept in insertion order like the records of the row heap.'''
+    def __init__(self, dtype, dimnames=None):
+        self.index = dict()
+        self.oids = list()
+        dimmap = dtype.__r_meta__.dimmap
+        dimnames = dtype.__r_meta__.dimnames if dimnames is None else dimnames
+        # dimname -> python type of the values in its typed array.
+        self.typed = {
+            dimname: dimmap[dimname].dim_type for dimname in dimnames
+            if dimmap[dimname].dim_type in ARRAY_TYPECODES}
+        self.columns = {
+            dimname: (
+                array(ARRAY_TYPECODES[self.typed[dimname]])
+                if dimname in self.typed else list())
+            for dimname in dimnames}
+
+    def __contains__(self, oid):
+        return oid in self.index
+
+    def __iter__(self):
+        return iter(self.oids)
+
+    def __len__(self):
+        return len(self.oids)
+
+    def keys(self):
+        return self.index.keys()
+
+    def _degrade(self, dimname):
+        # The value does not fit the typed array (None, an int that
+        # overflows, or a value that the array would convert, such as an
+        # int in a float column). The column falls back to a list for good.
+        self.typed.pop(dimname, None)
+        column = self.columns[dimname] = list(self.columns[dimname])
+        return column
+
+    def insert(self, oid, dim_map):
+        row = len(self.oids)
+        typed = self.typed
+        for dimname, column in self.columns.items():
+            value = dim_map.get(dimname)
+            if dimname in typed and type(value) is not typed[dimname]:
+                column = self._degrade(dimname)
+            try:
+                column.append(value)
+            except OverflowError:
+                self._degrade(dimname).append(value)
+        self.oids.append(oid)
+        # Readers without the lock find the row once it is complete.
+        self.index[oid] = row
+
+    def remove(self, oid):
+        # The last row is moved into the hole to keep the columns dense.
+        row = self.index.pop(oid)
+        last = len(self.oids) - 1
+        if row != last:
+            moved = self.oids[last]
+            self.oids[row] = moved
+            self.index[moved] = row
+            for column in self.columns.values():
+                column[row] = column[last]
+        self.oids.pop()
+        for column in self.columns.values():
+            column.pop()
+
+    def read(self, oid, dimname):
+        if oid in self.index and dimname in self.columns:
+            return self.columns[dimname][self.index[oid]]
+        return None
+
+    def read_dims(self, oid):
+        row = self.index[oid]
+        return {
+            dimname: column[row] for dimname, column in self.columns.items()}
+
+    def write(self, oid, dimname, value):
+        if dimname not in self.columns:
+            return
+        row = self.index[oid]
+        if dimname in self.typed and type(value) is not self.typed[dimname]:
+            self._degrade(dimname)
+        try:
+            self.columns[dimname][row] = value
+        except OverflowError:
+            self._degrade(dimname)[row] = value
+
+    def write_column(self, dimname, oids, values):
+        if dimname not in self.columns:
+            return
+        if dimname in self.typed:
+            values = list(values)
+            dim_type = self.typed[dimname]
+            if any(type(value) is not dim_type for value in values):
+                self._degrade(dimname)
+        column, index = self.columns[dimname], self.index
+        try:
+            for oid, value in zip(oids, values):
+                column[index[oid]] = value
+        except OverflowError:
+            # Writing again from the start is harmless.
+            column = self._degrade(dimname)
+            for oid, value in zip(oids, values):
+                column[index[oid]] = value
+
+    def apply(self, dtpname, changes):
+        for oid, change in changes.items():
+            if change["types"][dtpname] is Event.Delete:
+                if oid in self.index:
+                    self.remove(oid)
+            elif oid in self.index:
+                for dimname, value in change["dims"].items():
+                    self.write(oid, dimname, value)
+            else:
+                self.insert(oid, change["dims"])
+
+
+class RowView(object):
+    '''The dims of one object, read from the columns.'''
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def get(self, dimname):
+        column = self.table.columns.get(dimname)
+        return None if column is None else column[self.row]
+
+
+class ColumnarHeap(ManagedHeap):
+    '''ManagedHeap that keeps each type in a TypeColumns instead of
+       a dict of object records. Checkouts and writes update the columns
+       in place.'''
+    def __init__(self, types):
+        super().__init__(types)
+        self.data = {
+            tpname: TypeColumns(
+                self.type_map[tpname], self.stored_dims[tpname])
+            for tpname in self.data
+        }
+
+    def _read_dims(self, dtpname, oid):
+        return self.data[dtpname].read_dims(oid)
+
+    def _get_record(self, dtpname, oid):
+        table = self.data[dtpname]
+        if oid not in table.index:
+            return dict()
+        return RowView(table, table.index[oid])
+
+    def _insert(self, dtpname, oid, dim_map):
+        self.data[dtpname].insert(oid, dim_map)
+
+    def _remove(self, dtpname, oid):
+        self.data[dtpname].remove(oid)
+
+    def _apply(self, data):
+        for dtpname, changes in data.items():
+            if dtpname in self.data:
+                self.data[dtpname].apply(dtpname, changes)
+
+    def _read_columns(self, dtpname, dimnames, oids=None):
+        table = self.data[dtpname]
+        columns = dict()
+        if oids is not None:
+            rows = [table.index[oid] for oid in oids]
+            for dimname in dimnames:
+                column = table.columns.get(dimname)
+                # Dims without a column read as None, as in the row heap.
+                columns[dimname] = (
+                    [None] * len(rows) if column is None
+                    else [column[row] for row in rows])
+            return oids, columns
+        for dimname in dimnames:
+            column = table.columns.get(dimname)
+            # Slicing copies the column, typed arrays stay typed arrays.
+            columns[dimname] = (
+                [None] * len(table.oids) if column is None else column[:])
+        return list(table.oids), columns
+
+    def _write_column(self, dtpname, dimname, oids, values):
+        self.data[dtpname].write_column(dimname, oids, values)
+
+    def _read_dimension(self, dtpname, oid, dimname):
+        return self.data[dtpname].read(oid, dimname)
+
+    def _write_dimension(self, dtpname, oid, dimname, value):
+        self.data[dtpname].write(oid, dimname, value)
@@ -26,6 +26,7 @@ class AIOSocketConnector(object):
         self.parent = parent
         self.details = details
         self.types = types
+        self.buffer_dims = utils.get_buffer_dims(types)
         self.parent_version = None
         self.parent_version = "ROOT"
         # Logger for SocketManager
@@ -49,7 +50,7 @@ class AIOSocketConnector(object):
                 enums.TransferFields.Versions: version,
                 enums.TransferFields.Data: diff_data
             }
-            await send_data(self.writer, package)
+            await send_data(self.writer, package, self.buffer_dims)
             succ = await recv_ack(self.reader)
             self.parent_version = self.get_new_version(version)
             return succ
@@ -105,12 +106,15 @@ class AIOSocketConnector(object):
 
 
 class AIOSocketServer(Thread):
-    def __init__(self, appname, server_port,
+    def __init__(self, appname, server_port, types,
                  pull_call_back, push_call_back, confirm_pull_req,
                  instrument_q):
         # Logger for SocketManager
         self.logger = utils.get_logger("%s_SocketManager" % appname)
 
+        # Dimensions that are sent as separate frames.
+        self.buffer_dims = utils.get_buffer_dims(types)
+
         # Call back function to process incoming pull requests.
         self.pull_call_back = pull_call_back
 
@@ -166,7 +170,7 @@ class AIOSocketServer(Thread):
                 elif data[
                         enums.TransferFields.RequestType] == enums.RequestType.Pull:
                     resp = self.process_pull(data)
-                    await send_data(writer, resp)
+                    await send_data(writer, resp, self.buffer_dims)
                     succ = await recv_ack(reader)
                     if not succ:
                         print ("Ack failed", succ)
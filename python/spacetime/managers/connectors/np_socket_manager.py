@@ -28,12 +28,30 @@ def send_all(con, data):
             break
         data = data[sent:]
 
+def receive_buffers(con, locations):
+    # Each buffer is received straight into its own memory.
+    buffers = list()
+    for _, _, _, length in locations:
+        buffer = memoryview(bytearray(length))
+        received = 0
+        while received < length:
+            received += con.recv_into(buffer[received:], length - received)
+        buffers.append(buffer.toreadonly())
+    return buffers
+
+def send_buffers(con, buffers):
+    for buffer in buffers:
+        send_all(con, buffer)
+
 
 class NPSocketServer(Thread):
-    def __init__(self, appname, server_port, pull_call_back, push_call_back, confirm_pull_req, instrument_q):
+    def __init__(self, appname, server_port, types, pull_call_back, push_call_back, confirm_pull_req, instrument_q):
         # Logger for SocketManager
         self.logger = utils.get_logger("%s_SocketManager" % appname)
 
+        # Dimensions that are sent as separate frames.
+        self.buffer_dims = utils.get_buffer_dims(types)
+
         # Number of workers in pool for connection
         self.worker_count = MAX_THREADPOOL_WORKERS
 
@@ -112,6 +130,11 @@ class NPSocketServer(Thread):
             self.logger.debug(
                 "Recv raw data from %s, %d (%d)", address[0], address[1], req_count)
             data = cbor.loads(raw_data)
+            if enums.TransferFields.Buffers in data:
+                utils.insert_buffers(
+                    data[enums.TransferFields.Data],
+                    data[enums.TransferFields.Buffers],
+                    receive_buffers(con, data[enums.TransferFields.Buffers]))
             self.logger.debug(
                 "Converted data from %s, %d (%d)", address[0], address[1], req_count)
             # Get app name
@@ -134,13 +157,19 @@ class NPSocketServer(Thread):
                 with self.app_lock.setdefault(req_app, RLock()):
                     dict_to_send, new_versions = self.pull_call_back(req_app, versions)
                     self.logger.debug("Pull call back complete. sending back data. (%d)", req_count)
-                    data_to_send = cbor.dumps({
+                    dict_to_send, locations, buffers = utils.extract_buffers(
+                        dict_to_send, self.buffer_dims)
+                    resp = {
                         enums.TransferFields.AppName: self.port,
                         enums.TransferFields.Data: dict_to_send,
-                        enums.TransferFields.Versions: new_versions})
+                        enums.TransferFields.Versions: new_versions}
+                    if locations:
+                        resp[enums.TransferFields.Buffers] = locations
+                    data_to_send = cbor.dumps(resp)
                     con.send(pack("!L", len(data_to_send)))
                     self.logger.debug("Pull complete. sent back data. (%d)", req_count)
                     send_all(con, data_to_send)
+                    send_buffers(con, buffers)
                     if unpack("!?", con.recv(1))[0]:
                         self.confirm_pull_req(req_app, new_versions)
                         self.logger.debug("Pull completed successfully. Recved ack. (%d)", req_count)
@@ -167,6 +196,7 @@ class NPSocketConnector(object):
         self.parent_version = "ROOT"
         # Logger for SocketManager
         self.logger = utils.get_logger("%s_SocketConnector" % self.appname)
+        self.buffer_dims = utils.get_buffer_dims(types)
 
     def get_new_version(self, new_versions):
         return new_versions[1]
@@ -190,6 +220,12 @@ class NPSocketConnector(object):
 
             content_length = unpack("!L", req_socket.recv(4))[0]
             data = cbor.loads(receive_data(req_socket, content_length))
+            if enums.TransferFields.Buffers in data:
+                utils.insert_buffers(
+                    data[enums.TransferFields.Data],
+                    data[enums.TransferFields.Buffers],
+                    receive_buffers(
+                        req_socket, data[enums.TransferFields.Buffers]))
             self.logger.debug("Data received (pull req).")
             # Versions
             new_versions = data[enums.TransferFields.Versions]
@@ -209,12 +245,16 @@ class NPSocketConnector(object):
     @instrument_func("send_push")
     def push_req(self, diff_data, version):
         try:
+            diff_data, locations, buffers = utils.extract_buffers(
+                diff_data, self.buffer_dims)
             package = {
                 enums.TransferFields.AppName: self.appname,
                 enums.TransferFields.RequestType: enums.RequestType.Push,
                 enums.TransferFields.Versions: version,
                 enums.TransferFields.Data: diff_data
             }
+            if locations:
+                package[enums.TransferFields.Buffers] = locations
             data = cbor.dumps(package)
             req_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             # req_socket.settimeout(2)
@@ -223,6 +263,7 @@ class NPSocketConnector(object):
             self.logger.debug("Client Connection successful, sending data (push req)")
             req_socket.send(pack("!L", len(data)))
             send_all(req_socket, data)
+            send_buffers(req_socket, buffers)
             self.logger.debug("Data sent (push req)")
             succ = unpack("!?", req_socket.recv(1))[0]
             self.logger.debug("Ack recv (push req)")
@@ -28,6 +28,21 @@ def send_all(con, data):
             break
         data = data[sent:]
 
+def receive_buffers(con, locations):
+    # Each buffer is received straight into its own memory.
+    buffers = list()
+    for _, _, _, length in locations:
+        buffer = memoryview(bytearray(length))
+        received = 0
+        while received < length:
+            received += con.recv_into(buffer[received:], length - received)
+        buffers.append(buffer.toreadonly())
+    return buffers
+
+def send_buffers(con, buffers):
+    for buffer in buffers:
+        send_all(con, buffer)
+
 def guarded(func):
     def guarded_func(self, *args, **kwargs):
         if self.server_connection is None:
@@ -45,10 +60,13 @@ def guarded(func):
 
 class ServingClient(Thread):
     def __init__(
-            self, appname, server_port, address, client_sock,
+            self, appname, server_port, address, client_sock, buffer_dims,
             pull_call_back, push_call_back, confirm_pull_req, delete_client, instrument_q):
         self.logger = utils.get_logger("%s_SocketManager" % appname)
 
+        # Dimensions that are sent as separate frames.
+        self.buffer_dims = buffer_dims
+
         # Call back function to process incoming pull requests.
         self.pull_call_back = pull_call_back
 
@@ -103,6 +121,11 @@ class ServingClient(Thread):
             self.logger.debug(
                 "Recv raw data from %s, %d", address[0], address[1])
             data = cbor.loads(raw_data)
+            if enums.TransferFields.Buffers in data:
+                utils.insert_buffers(
+                    data[enums.TransferFields.Data],
+                    data[enums.TransferFields.Buffers],
+                    receive_buffers(con, data[enums.TransferFields.Buffers]))
             self.logger.debug(
                 "Converted data from %s, %d", address[0], address[1])
             # Get app name
@@ -136,14 +159,20 @@ class ServingClient(Thread):
                         wait=wait, timeout=timeout)
                     self.logger.debug(
                         "Pull call back complete. sending back data.")
-                    data_to_send = cbor.dumps({
+                    dict_to_send, locations, buffers = utils.extract_buffers(
+                        dict_to_send, self.buffer_dims)
+                    resp = {
                         enums.TransferFields.AppName: self.port,
                         enums.TransferFields.Data: dict_to_send,
                         enums.TransferFields.Versions: new_versions,
-                        enums.TransferFields.Status: enums.StatusCode.Success})
+                        enums.TransferFields.Status: enums.StatusCode.Success}
+                    if locations:
+                        resp[enums.TransferFields.Buffers] = locations
+                    data_to_send = cbor.dumps(resp)
                     con.send(pack("!L", len(data_to_send)))
                     self.logger.debug("Pull complete. sent back data.")
                     send_all(con, data_to_send)
+                    send_buffers(con, buffers)
                     if unpack("!?", con.recv(1))[0]:
                         self.confirm_pull_req(req_app, new_versions)
                         self.logger.debug(
@@ -170,12 +199,15 @@ class TSocketServer(Thread):
         return len(self.clients)
 
     def __init__(
-            self, appname, server_port,
+            self, appname, server_port, types,
             pull_call_back, push_call_back, confirm_pull_req, instrument_q):
         self.appname = appname
         # Logger for SocketManager
         self.logger = utils.get_logger("%s_SocketManager" % appname)
 
+        # Dimensions that are sent as separate frames.
+        self.buffer_dims = utils.get_buffer_dims(types)
+
         # Call back function to process incoming pull requests.
         self.pull_call_back = pull_call_back
 
@@ -222,7 +254,7 @@ class TSocketServer(Thread):
                     "Recv connection from %s, %d",
                     addr[0], addr[1])
                 client_thread = ServingClient(
-                    self.appname, self.port, addr, con,
+                    self.appname, self.port, addr, con, self.buffer_dims,
                     self.pull_call_back, self.push_call_back,
                     self.confirm_pull_req, self.delete_client,
                     self.instrument_record)
@@ -252,6 +284,7 @@ class TSocketConnector(object):
             tp.__r_meta__.name: tp.__r_meta__.name_chain
             for tp in types
         }
+        self.buffer_dims = utils.get_buffer_dims(types)
         self.server_connection = self.connect_to_parent()
 
     def connect_to_parent(self):
@@ -291,6 +324,13 @@ class TSocketConnector(object):
             content_length = unpack("!L", self.server_connection.recv(4))[0]
             resp = receive_data(self.server_connection, content_length)
             data = cbor.loads(resp)
+            if enums.TransferFields.Buffers in data:
+                utils.insert_buffers(
+                    data[enums.TransferFields.Data],
+                    data[enums.TransferFields.Buffers],
+                    receive_buffers(
+                        self.server_connection,
+                        data[enums.TransferFields.Buffers]))
             self.logger.debug("Data received (pull req).")
             if (wait 
                     and timeout > 0 
@@ -320,6 +360,8 @@ class TSocketConnector(object):
     @guarded
     def push_req(self, diff_data, version, wait=False):
         try:
+            diff_data, locations, buffers = utils.extract_buffers(
+                diff_data, self.buffer_dims)
             package = {
                 enums.TransferFields.AppName: self.appname,
                 enums.TransferFields.RequestType: enums.RequestType.Push,
@@ -327,9 +369,12 @@ class TSocketConnector(object):
                 enums.TransferFields.Data: diff_data,
                 enums.TransferFields.Wait: wait
             }
+            if locations:
+                package[enums.TransferFields.Buffers] = locations
             data = cbor.dumps(package)
             self.server_connection.send(pack("!L", len(data)))
             send_all(self.server_connection, data)
+            send_buffers(self.server_connection, buffers)
             self.logger.debug("Data sent (push req)")
             succ = unpack("!?", self.server_connection.recv(1))[0]
             self.logger.debug("Ack recv (push req)")
@@ -1,16 +1,19 @@
-from uuid import uuid4
 from spacetime.utils.enums import Event
+from spacetime.utils.utils import new_version
+from rtypes.utils.enums import Datatype
+from rtypes.utils.converter import same_buffer
 
 class Diff(dict):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.version = str(uuid4())
+        self.version = new_version()
+        # dtpname -> oid -> {dimname -> value before the first write}
+        self.bases = dict()
 
-    def add(self, dtype, objs):
+    def add(self, dtype, oids, dim_maps):
         dtpname = dtype.__r_meta__.name
         tpchange = self.setdefault(dtpname, dict())
-        for obj in objs:
-            oid, dim_map = extract(dtype, obj)
+        for oid, dim_map in zip(oids, dim_maps):
             tpchange[oid] = {
                 "dims": dim_map,
                 "types": {
@@ -18,7 +21,7 @@ class Diff(dict):
                 }
             }
 
-    def write_dimension(self, dtype, oid, dim, value):
+    def write_dimension(self, dtype, oid, dim, value, base):
         dtpname = dtype.__r_meta__.name
         # No need for locks because once this operation is set
         # which is either the old list, and can be added.
@@ -27,6 +30,11 @@ class Diff(dict):
         if oid in tpchange and tpchange[oid]["types"][dtpname] is Event.Delete:
             # If the object was marked for delete, modifications shouldnt work.
             return
+        if self._reverts(tpchange, dtpname, oid, dim, value, base):
+            if not tpchange:
+                # Nothing left to commit for the type.
+                del self[dtpname]
+            return
 
         change = tpchange.setdefault(
             oid, {"dims": dict(), "types": dict()})
@@ -34,6 +42,63 @@ class Diff(dict):
         if dtpname not in change["types"]:
            change["types"][dtpname] = Event.Modification 
     
+    def write_column(self, dtype, dim, oids, values, bases):
+        dtpname = dtype.__r_meta__.name
+        tpchange = self.setdefault(dtpname, dict())
+        for oid, value, base in zip(oids, values, bases):
+            change = tpchange.get(oid)
+            if change is not None and (
+                    change["types"].get(dtpname) is Event.Delete):
+                continue
+            if self._reverts(tpchange, dtpname, oid, dim, value, base):
+                continue
+            if change is None:
+                tpchange[oid] = {
+                    "dims": {dim: value},
+                    "types": {dtpname: Event.Modification}}
+            else:
+                change["dims"][dim] = value
+                change["types"].setdefault(dtpname, Event.Modification)
+        if not tpchange:
+            del self[dtpname]
+
+    def _reverts(self, tpchange, dtpname, oid, dim, value, base):
+        # A write back to the value the dim had before this diff leaves
+        # nothing to send. base is the value the write replaces.
+        change = tpchange.get(oid)
+        if change is not None and change["types"].get(dtpname) is Event.New:
+            return False
+        tp_bases = self.bases.get(dtpname)
+        if tp_bases is None:
+            tp_bases = self.bases[dtpname] = dict()
+        bases = tp_bases.get(oid)
+        if bases is None:
+            bases = tp_bases[oid] = dict()
+        if not same_value(bases.setdefault(dim, base), value):
+            return False
+        if change is not None and dim in change["dims"]:
+            del change["dims"][dim]
+            if not change["dims"] and change["types"] == {
+                    dtpname: Event.Modification}:
+                del tpchange[oid]
+        return True
+
+    def rebase(self, data):
+        '''Forgets the bases of the objects changed by a checkout.'''
+        for dtpname, changes in data.items():
+            bases = self.bases.get(dtpname)
+            if bases:
+                for oid in changes:
+                    bases.pop(oid, None)
+
+    def detach(self):
+        '''Copies the dims that new records share with the heap. The
+           diff is then not written to again and can be shared.'''
+        for dtpname, tpchange in self.items():
+            for change in tpchange.values():
+                if change["types"].get(dtpname) is Event.New:
+                    change["dims"] = dict(change["dims"])
+
     def has_new_value(self, dtype, oid, dim):
         dtpname = dtype.__r_meta__.name
         return (
@@ -84,5 +149,15 @@ class Diff(dict):
                 "types": {dtpname: Event.Delete}}
 
 
-def extract(dtype, obj):
-    return obj.__r_oid__, dtype.__r_table__[obj.__r_oid__]
\ No newline at end of file
+def same_value(value, other):
+    # Encoded values, an int is not the same as an equal float.
+    if type(value) is not type(other):
+        return False
+    if (type(value) is list and value and value[0] == Datatype.NPARRAY
+            and type(value[1]) is memoryview
+            and type(other[1]) is memoryview):
+        return value[2:] == other[2:] and same_buffer(value[1], other[1])
+    try:
+        return bool(value == other)
+    except ValueError:
+        return False
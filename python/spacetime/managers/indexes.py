@@ -0,0 +1,425 @@
+from bisect import bisect_left, insort
+from itertools import count
+from math import floor, hypot
+
+from rtypes.utils.converter import HASNUMPY, decode_column
+from rtypes.utils.enums import Rtype
+
+if HASNUMPY:
+    import numpy as np
+
+# Indexes are kept by the heap for the root pcc_set of the objects.
+# After an object is added or changed the heap calls
+# index.update(oid, record), with record the stored dims of the object,
+# and index.remove(oid) when the object goes away. update is only called
+# for changes to the dims in index.dims. When many objects change at
+# once, the heap calls index.update_many(oids) instead if it exists.
+
+
+def subset_predicates(meta):
+    '''(func, [(dimname, decode)], vectorized) for the predicates of a
+       subset and of its parent subsets, from the outermost subset in.
+       A member must satisfy all of them.'''
+    predicates = list()
+    while meta.rtype is Rtype.SUBSET:
+        pred_func = meta.pred_func
+        dimnames = [dim.dimname for dim in pred_func.dims]
+        predicates.insert(0, (
+            pred_func.func,
+            [(dimname, meta.dimmap[dimname].decode) for dimname in dimnames],
+            pred_func.vectorized))
+        meta = meta.parent
+    return predicates
+
+
+def holds(func, values):
+    # Dims that are not assigned yet are None, and a predicate such as
+    # c.xvel > 0 fails on them. An object it fails on is not a member.
+    try:
+        return bool(func(*values))
+    except Exception:
+        return False
+
+
+def satisfies(predicates, record, df=None):
+    return all(
+        holds(func, [
+            decode(record.get(dimname), df) for dimname, decode in args])
+        for func, args, _ in predicates)
+
+
+def decode_columns(dimmap, dimnames, records, df=None):
+    '''dimname -> decoded values of the dim in each of the records.'''
+    return {
+        dimname: decode_column(
+            dimmap[dimname], [record.get(dimname) for record in records], df)
+        for dimname in dimnames}
+
+
+def evaluate(predicates, columns, count):
+    '''Whether each of the count rows of the decoded columns satisfies
+       all predicates. Vectorized predicates are called once with the
+       numpy columns. The others, or when a column could not be an
+       array, are called for each row that is still selected.'''
+    if not HASNUMPY:
+        return [
+            all(holds(func, [columns[dimname][row] for dimname, _ in args])
+                for func, args, _ in predicates)
+            for row in range(count)]
+    mask = np.ones(count, dtype=bool)
+    for func, args, vectorized in predicates:
+        values = [columns[dimname] for dimname, _ in args]
+        if vectorized and all(
+                isinstance(value, np.ndarray) for value in values):
+            try:
+                mask &= np.asarray(func(*values), dtype=bool)
+                continue
+            except Exception:
+                # Row by row, so that only the failing rows are out.
+                pass
+        values = [
+            value.tolist() if isinstance(value, np.ndarray) else value
+            for value in values]
+        for row in np.flatnonzero(mask).tolist():
+            mask[row] = holds(func, [value[row] for value in values])
+    return mask.tolist()
+
+
+class SubsetIndex(object):
+    '''Oids of the objects of the root type that are in a subset. The
+       predicates of the subset and of its parent subsets are evaluated
+       again only when one of their dims changes.'''
+    def __init__(self, heap, dtype):
+        self.heap = heap
+        self.dtype = dtype
+        self.members = set()
+        self.tracked = heap.tracked_objs[dtype.__r_meta__.name]
+        self.storage = heap.storage_name[dtype.__r_meta__.name]
+        self.predicates = subset_predicates(dtype.__r_meta__)
+        self.dims = {
+            dimname for _, args, _ in self.predicates for dimname, _ in args}
+
+    def __contains__(self, oid):
+        return oid in self.members
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __len__(self):
+        return len(self.members)
+
+    def keys(self):
+        return self.members
+
+    def update(self, oid, record):
+        if satisfies(self.predicates, record, self.heap):
+            self.members.add(oid)
+        else:
+            self.remove(oid)
+
+    def update_many(self, oids):
+        heap = self.heap
+        dimmap = self.dtype.__r_meta__.dimmap
+        oids, columns = heap._read_columns(self.storage, self.dims, oids)
+        columns = {
+            dimname: decode_column(dimmap[dimname], values, heap)
+            for dimname, values in columns.items()}
+        for oid, member in zip(
+                oids, evaluate(self.predicates, columns, len(oids))):
+            if member:
+                self.members.add(oid)
+            else:
+                self.remove(oid)
+
+    def remove(self, oid):
+        self.members.discard(oid)
+        # The object is no longer read as a member of the subset.
+        self.tracked.pop(oid, None)
+
+
+def index_key(value):
+    # Encoded values can be lists, which are not hashable.
+    if type(value) is list:
+        return tuple(index_key(item) for item in value)
+    return value
+
+
+def key_value(key):
+    # The stored value that index_key made the key from.
+    if type(key) is tuple:
+        return [key_value(item) for item in key]
+    return key
+
+
+class HashIndex(object):
+    '''Stored value of one dimension -> oids with that value.'''
+    def __init__(self, dimname):
+        self.dimname = dimname
+        self.dims = {dimname}
+        self.oids_by_value = dict()
+        self.value_of = dict()
+
+    def lookup(self, value):
+        return self.oids_by_value.get(index_key(value), ())
+
+    def update(self, oid, record):
+        key = index_key(record.get(self.dimname))
+        if oid in self.value_of:
+            if self.value_of[oid] == key:
+                return
+            self.remove(oid)
+        self.value_of[oid] = key
+        self.oids_by_value.setdefault(key, set()).add(oid)
+
+    def remove(self, oid):
+        if oid not in self.value_of:
+            return
+        key = self.value_of.pop(oid)
+        oids = self.oids_by_value[key]
+        oids.discard(oid)
+        if not oids:
+            del self.oids_by_value[key]
+
+
+class _Top(object):
+    # Sorts after every number, to find the end of a run of equal values.
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+TOP = _Top()
+
+
+class RangeIndex(object):
+    '''(value, seq, oid) entries of one dimension kept sorted. seq is
+       the insertion order, so equal values never compare their oids,
+       which can be of different types. Missing values and NaN are not
+       indexed. The entries are kept in sorted buckets of up to 2 * LOAD
+       entries, so an update only shifts one bucket.'''
+    LOAD = 256
+
+    def __init__(self, dimname):
+        self.dimname = dimname
+        self.dims = {dimname}
+        self.buckets = list()
+        # Last entry of each bucket.
+        self.maxes = list()
+        self.entry_of = dict()
+        self.seq = count()
+
+    def between(self, lo=None, hi=None):
+        first = (lo,)
+        last = (hi, TOP)
+        oids = list()
+        start = 0 if lo is None else bisect_left(self.maxes, first)
+        for bucket in self.buckets[start:]:
+            pos = 0 if lo is None else bisect_left(bucket, first)
+            for entry in bucket[pos:]:
+                if hi is not None and not entry < last:
+                    return oids
+                oids.append(entry[2])
+        return oids
+
+    def descending(self):
+        for bucket in reversed(self.buckets):
+            for _, _, oid in reversed(bucket):
+                yield oid
+
+    def _add(self, entry):
+        if not self.buckets:
+            self.buckets.append([entry])
+            self.maxes.append(entry)
+            return
+        i = bisect_left(self.maxes, entry)
+        if i == len(self.maxes):
+            i -= 1
+            self.buckets[i].append(entry)
+            self.maxes[i] = entry
+        else:
+            insort(self.buckets[i], entry)
+        bucket = self.buckets[i]
+        if len(bucket) > 2 * self.LOAD:
+            half = len(bucket) // 2
+            self.buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+            self.maxes[i:i + 1] = [bucket[half - 1], bucket[-1]]
+
+    def update(self, oid, record):
+        value = record.get(self.dimname)
+        if oid in self.entry_of:
+            if self.entry_of[oid][0] == value:
+                return
+            self.remove(oid)
+        if value is None or value != value:
+            return
+        entry = self.entry_of[oid] = (value, next(self.seq), oid)
+        self._add(entry)
+
+    def remove(self, oid):
+        if oid not in self.entry_of:
+            return
+        entry = self.entry_of.pop(oid)
+        i = bisect_left(self.maxes, entry)
+        bucket = self.buckets[i]
+        del bucket[bisect_left(bucket, entry)]
+        if bucket:
+            self.maxes[i] = bucket[-1]
+        else:
+            del self.buckets[i]
+            del self.maxes[i]
+
+
+class GridIndex(object):
+    '''Oids bucketed by the grid cell of two numeric dims. Objects with
+       a missing or NaN coordinate are not indexed.'''
+    def __init__(self, xdim, ydim, cell_size):
+        self.xdim = xdim
+        self.ydim = ydim
+        self.cell_size = cell_size
+        self.dims = {xdim, ydim}
+        # cell -> oids in it
+        self.cells = dict()
+        # oid -> (x, y, cell)
+        self.position = dict()
+
+    def _cell(self, x, y):
+        return (int(floor(x / self.cell_size)),
+                int(floor(y / self.cell_size)))
+
+    def within(self, xmin, ymin, xmax, ymax):
+        '''Oids with xmin <= x <= xmax and ymin <= y <= ymax.'''
+        (cxmin, cymin), (cxmax, cymax) = (
+            self._cell(xmin, ymin), self._cell(xmax, ymax))
+        if (cxmax - cxmin + 1) * (cymax - cymin + 1) > len(self.cells):
+            # A big box, look at the cells that have objects instead.
+            cells = [
+                cell for cell in self.cells
+                if cxmin <= cell[0] <= cxmax and cymin <= cell[1] <= cymax]
+        else:
+            cells = [
+                (cx, cy) for cx in range(cxmin, cxmax + 1)
+                for cy in range(cymin, cymax + 1) if (cx, cy) in self.cells]
+        oids = list()
+        position = self.position
+        for cell in cells:
+            for oid in self.cells[cell]:
+                x, y, _ = position[oid]
+                if xmin <= x <= xmax and ymin <= y <= ymax:
+                    oids.append(oid)
+        return oids
+
+    def near(self, x, y, radius):
+        '''Oids within radius of (x, y), nearest first.'''
+        position = self.position
+        found = list()
+        for oid in self.within(x - radius, y - radius, x + radius, y + radius):
+            px, py, _ = position[oid]
+            distance = hypot(px - x, py - y)
+            if distance <= radius:
+                found.append((distance, oid))
+        found.sort()
+        return [oid for _, oid in found]
+
+    def update(self, oid, record):
+        x, y = record.get(self.xdim), record.get(self.ydim)
+        if x is None or y is None or x != x or y != y:
+            self.remove(oid)
+            return
+        cell = self._cell(x, y)
+        if oid in self.position and self.position[oid][2] != cell:
+            self.remove(oid)
+        if oid not in self.position:
+            self.cells.setdefault(cell, set()).add(oid)
+        self.position[oid] = (x, y, cell)
+
+    def remove(self, oid):
+        if oid not in self.position:
+            return
+        cell = self.position.pop(oid)[2]
+        oids = self.cells[cell]
+        oids.discard(oid)
+        if not oids:
+            del self.cells[cell]
+
+
+class Aggregate(object):
+    '''count, sum, min, max or mean of a dimension over the objects,
+       per value of group_by if given. Missing values do not count, a
+       count without a dimension counts the objects. If subset is given
+       only its members are aggregated.'''
+    FUNCS = ("count", "sum", "min", "max", "mean")
+
+    def __init__(self, func, dimname=None, group_by=None, subset=None):
+        if func not in self.FUNCS:
+            raise ValueError("Unknown aggregate {0}.".format(func))
+        if dimname is None and func != "count":
+            raise ValueError("{0} needs a dimension.".format(func))
+        self.func = func
+        self.dimname = dimname
+        self.group_by = group_by
+        self.subset = subset
+        self.dims = {dimname for dimname in (dimname, group_by) if dimname}
+        if subset is not None:
+            self.dims.update(subset.dims)
+        # oid -> (group, value) that the object adds.
+        self.added = dict()
+        self.counts = dict()
+        self.sums = dict()
+        # group -> RangeIndex of the values, for min and max.
+        self.ordered = dict()
+
+    def result(self, group=None):
+        count = self.counts.get(group, 0)
+        if self.func == "count":
+            return count
+        if self.func == "sum":
+            return self.sums.get(group, 0)
+        if self.func == "mean":
+            return self.sums[group] / count if count else None
+        ordered = self.ordered.get(group)
+        if ordered is None or not ordered.buckets:
+            return None
+        if self.func == "min":
+            return ordered.buckets[0][0][0]
+        return ordered.buckets[-1][-1][0]
+
+    def groups(self):
+        return list(self.counts)
+
+    def update(self, oid, record):
+        if self.subset is not None and oid not in self.subset:
+            self.remove(oid)
+            return
+        group = (
+            index_key(record.get(self.group_by)) if self.group_by else None)
+        value = record.get(self.dimname) if self.dimname else True
+        if value is None:
+            self.remove(oid)
+            return
+        if oid in self.added:
+            if self.added[oid] == (group, value):
+                return
+            self.remove(oid)
+        self.added[oid] = (group, value)
+        self.counts[group] = self.counts.get(group, 0) + 1
+        if self.func in ("sum", "mean"):
+            self.sums[group] = self.sums.get(group, 0) + value
+        elif self.func in ("min", "max"):
+            if group not in self.ordered:
+                self.ordered[group] = RangeIndex(self.dimname)
+            self.ordered[group].update(oid, {self.dimname: value})
+
+    def remove(self, oid):
+        if oid not in self.added:
+            return
+        group, value = self.added.pop(oid)
+        self.counts[group] -= 1
+        if self.func in ("sum", "mean"):
+            self.sums[group] -= value
+        elif self.func in ("min", "max"):
+            self.ordered[group].remove(oid)
+        if not self.counts[group]:
+            del self.counts[group]
+            self.sums.pop(group, None)
+            self.ordered.pop(group, None)
@@ -1,9 +1,153 @@
-from spacetime.managers.diff import Diff
+from spacetime.managers.diff import Diff, same_value
+from spacetime.managers.indexes import (
+    SubsetIndex, HashIndex, RangeIndex, GridIndex, Aggregate,
+    index_key, key_value)
 from spacetime.utils.enums import Event
 import spacetime.utils.utils as utils
-from rtypes.utils.enums import Rtype
+from rtypes.utils.enums import Rtype, Datatype
+from rtypes.utils.converter import encode_column, decode_column
 from spacetime.utils.rwlock import RWLockFair as RWLock
 from threading import RLock
+from collections import deque
+from weakref import KeyedRef, ref as weak_ref
+
+# Proxies of a type that the heap keeps alive, so that walks over recently
+# read objects reuse them. Older ones live only while the app holds them.
+KEEP_PROXIES = 100000
+
+
+class ObjectView(object):
+    '''The objects of a type as of when the view was taken, less the ones
+       deleted since. Only the oids are copied, proxies are made when an
+       object is touched. The proxies read the current values, like the
+       ones from read_all, the view does not pin them.'''
+    def __init__(self, heap, dtype, oids):
+        self.heap = heap
+        self.dtype = dtype
+        self.oids = oids
+        self._oid_set = None
+        # The epoch changes when objects are deleted, but leaving a subset
+        # is a plain write, so subset views check every time.
+        self._cache_members = dtype.__r_meta__.name not in heap.subsets
+        self._members = (heap.epoch, oids)
+
+    def members(self):
+        '''The oids of the view that are still in the heap.'''
+        heap = self.heap
+        epoch, oids = self._members
+        if self._cache_members and epoch is not None and epoch is heap.epoch:
+            return oids
+        with heap.access_lock.gen_rlock():
+            exists = heap._exists
+            oids = [oid for oid in self.oids if exists(self.dtype, oid)]
+            self._members = (heap.epoch, oids)
+        return oids
+
+    def __len__(self):
+        return len(self.members())
+
+    def __contains__(self, item):
+        if self._oid_set is None:
+            self._oid_set = set(self.oids)
+        if isinstance(item, self.dtype):
+            item = item.__r_oid__
+        if item not in self._oid_set:
+            return False
+        with self.heap.access_lock.gen_rlock():
+            return self.heap._exists(self.dtype, item)
+
+    def __iter__(self):
+        for oid in self.members():
+            obj = self.heap.read_one(self.dtype, oid)
+            if obj is not None:
+                yield obj
+
+    def __getitem__(self, index):
+        oid = self.members()[index]
+        obj = self.heap.read_one(self.dtype, oid)
+        if obj is None:
+            # Deleted since members() was read.
+            raise KeyError(oid)
+        return obj
+
+
+class ProxyTable(dict):
+    '''oid -> the proxy of the object. The last keep proxies that were
+       made are held, older ones only by a weak reference whose callback
+       drops the entry once the proxy is collected. A proxy keeps its
+       identity while the application holds it.
+       The window is first in, first out. Reads do not move a proxy, to
+       keep them cheap. A proxy that ages out while nothing holds it is
+       made again on its next read, as one of the newest.'''
+    def __init__(self, keep=KEEP_PROXIES):
+        super().__init__()
+        self.keep = keep
+        # Oids in the order their proxies were made.
+        self.recent = deque()
+        table = weak_ref(self)
+
+        def remove(ref):
+            # The proxy was collected. The entry could have been given a
+            # new proxy meanwhile, that one stays.
+            self = table()
+            if self is not None and dict.get(self, ref.key) is ref:
+                dict.pop(self, ref.key, None)
+        self._remove = remove
+
+    def get(self, oid, default=None):
+        obj = dict.get(self, oid)
+        if type(obj) is KeyedRef:
+            obj = obj()
+        return default if obj is None else obj
+
+    def __getitem__(self, oid):
+        obj = self.get(oid)
+        if obj is None:
+            raise KeyError(oid)
+        return obj
+
+    def __setitem__(self, oid, obj):
+        self.add_many([oid], [obj])
+
+    def __contains__(self, oid):
+        return self.get(oid) is not None
+
+    def __iter__(self):
+        return iter(list(dict.keys(self)))
+
+    def add_many(self, oids, objs):
+        dict.update(self, zip(oids, objs))
+        self.recent.extend(oids)
+        if len(self.recent) > self.keep:
+            self._weaken(len(self.recent) - self.keep)
+
+    def pop(self, oid, *default):
+        obj = dict.pop(self, oid, None)
+        if type(obj) is KeyedRef:
+            obj = obj()
+        if obj is None:
+            if default:
+                return default[0]
+            raise KeyError(oid)
+        return obj
+
+    def values(self):
+        objs = list()
+        for obj in list(dict.values(self)):
+            if type(obj) is KeyedRef:
+                obj = obj()
+            if obj is not None:
+                objs.append(obj)
+        return objs
+
+    def _weaken(self, count):
+        popleft = self.recent.popleft
+        for _ in range(count):
+            oid = popleft()
+            obj = dict.get(self, oid)
+            if obj is not None and type(obj) is not KeyedRef:
+                dict.__setitem__(
+                    self, oid, KeyedRef(obj, self._remove, oid))
 
 
 class ManagedHeap(object):
@@ -12,22 +156,75 @@ class ManagedHeap(object):
         self.access_lock = RWLock(lock_factory=RLock)
         self.type_map = {
             tp.__r_meta__.name: tp
-            for tp in types
+            for tp in utils.get_root_types(types)
+        }
+        # Objects of subsets are stored with their root pcc_set.
+        self.storage_name = {
+            tpname: tp.__r_meta__.root.__r_meta__.name
+            for tpname, tp in self.type_map.items()
         }
         self.data = {
-            tp.__r_meta__.name: dict()
-            for tp in types
+            tpname: dict()
+            for tpname in set(self.storage_name.values())
         }
+        # Types declared only through projections keep the projected dims.
+        self.stored_dims = utils.get_stored_dims(types)
         self.diff = Diff()
         self.version = None
         self.version = "ROOT"
 
+        # Proxies are tracked weakly, see ProxyTable.
         self.tracked_objs = {
-            tp.__r_meta__.name: dict()
-            for tp in types
+            tpname: ProxyTable()
+            for tpname in self.type_map
         }
 
         self.pending_commit = Diff()
+        # Replaced whenever records can move or disappear, objects
+        # cache their record (see get_record) along with it. It is None
+        # while records are being moved (see _moving_records).
+        self.epoch = object()
+
+        # root tpname -> indexes over its objects, see indexes.py
+        self.indexes = {tpname: list() for tpname in self.data}
+        self.dim_indexes = {tpname: dict() for tpname in self.data}
+        self.subsets = dict()
+        self.hash_indexes = {tpname: dict() for tpname in self.data}
+        self.range_indexes = {tpname: dict() for tpname in self.data}
+        # root tpname -> (xdim, ydim) -> GridIndex
+        self.grid_indexes = {tpname: dict() for tpname in self.data}
+        # (tpname, func, dimname, group_by) -> Aggregate
+        self.aggregates = dict()
+
+        # The delta applied by the last checkout, and which of the
+        # objects it changed were members of each subset before it.
+        self.last_changes = dict()
+        self.last_members = dict()
+        # tpname -> callbacks to call with the changes after a checkout.
+        self.listeners = dict()
+        for tpname, tp in self.type_map.items():
+            if tp.__r_meta__.rtype is Rtype.SUBSET:
+                self.subsets[tpname] = SubsetIndex(self, tp)
+                self._add_index(self.storage_name[tpname], self.subsets[tpname])
+                continue
+            if tp.__r_meta__.rtype is not Rtype.SET:
+                continue
+            for grid in tp.__r_meta__.grids:
+                if {grid.xdim, grid.ydim}.issubset(self.stored_dims[tpname]):
+                    index = self.grid_indexes[tpname][
+                        (grid.xdim, grid.ydim)] = GridIndex(
+                            grid.xdim, grid.ydim, grid.cell_size)
+                    self._add_index(tpname, index)
+            for dimname in self.stored_dims[tpname]:
+                dim_obj = tp.__r_meta__.dimmap[dimname]
+                if dim_obj.index:
+                    index = self.hash_indexes[tpname][dimname] = (
+                        HashIndex(dimname))
+                    self._add_index(tpname, index)
+                if dim_obj.ordered:
+                    index = self.range_indexes[tpname][dimname] = (
+                        RangeIndex(dimname))
+                    self._add_index(tpname, index)
 
     def _take_control(self, tpname, obj):
         obj.__r_df__ = self
@@ -35,40 +232,243 @@ class ManagedHeap(object):
         return obj
 
     def _release_control(self, dtype, oid):
-        dtpname = dtype.__r_meta__.name
-        if dtpname in self.tracked_objs and oid in self.tracked_objs[dtpname]:
-            dtype.__r_table__.object_table[oid] = {
-                dimname: self.read_dimension(dtype, oid, dimname)
-                for dimname in dtype.__r_meta__.dimnames
-            }
-            obj = self.tracked_objs[dtpname][oid]
+        dtpname = self._storage(dtype)
+        released = False
+        for tpname, tracked in self.tracked_objs.items():
+            if self.storage_name[tpname] != dtpname:
+                continue
+            obj = tracked.pop(oid, None)
+            if obj is None:
+                continue
+            if not released:
+                # The proxy is still held, it keeps its values.
+                self.type_map[dtpname].__r_table__.object_table[oid] = (
+                    self._read_dims(dtpname, oid))
+                released = True
             obj.__r_df__ = None
-            del self.tracked_objs[dtpname][oid]
+
+    def _storage(self, dtype):
+        dtpname = dtype.__r_meta__.name
+        return self.storage_name.get(dtpname, dtpname)
 
     def _exists(self, dtype, oid):
         dtpname = dtype.__r_meta__.name
+        if dtpname in self.subsets:
+            return oid in self.subsets[dtpname]
+        dtpname = self.storage_name.get(dtpname, dtpname)
         return dtpname in self.data and oid in self.data[dtpname]
 
+    def _oids(self, dtype):
+        # The oids of all objects of dtype, a subset or a stored type.
+        dtpname = dtype.__r_meta__.name
+        if dtpname in self.subsets:
+            return self.subsets[dtpname]
+        return self.data.get(self.storage_name.get(dtpname, dtpname), ())
+
+    # Indexes over the stored objects.
+
+    def _add_index(self, dtpname, index):
+        self.indexes[dtpname].append(index)
+        for dimname in index.dims:
+            self.dim_indexes[dtpname].setdefault(dimname, list()).append(index)
+
+    def _update_indexes(self, dtpname, oid, dimnames=None):
+        if dimnames is None:
+            indexes = self.indexes[dtpname]
+        else:
+            dim_indexes = self.dim_indexes[dtpname]
+            indexes = list()
+            for dimname in dimnames:
+                for index in dim_indexes.get(dimname, ()):
+                    if index not in indexes:
+                        indexes.append(index)
+        if indexes and oid in self.data[dtpname]:
+            record = self._get_record(dtpname, oid)
+            for index in indexes:
+                index.update(oid, record)
+
+    def _update_index_many(self, dtpname, index, oids):
+        update_many = getattr(index, "update_many", None)
+        if update_many is not None:
+            update_many(oids)
+            return
+        for oid in oids:
+            index.update(oid, self._get_record(dtpname, oid))
+
+    def _remove_from_indexes(self, dtpname, oid):
+        for index in self.indexes[dtpname]:
+            index.remove(oid)
+
+    def _index_changes(self, data):
+        for dtpname, changes in data.items():
+            if not self.indexes.get(dtpname):
+                continue
+            records = self.data[dtpname]
+            dim_indexes = self.dim_indexes[dtpname]
+            # index -> the changed oids it has to see.
+            updates = {index: list() for index in self.indexes[dtpname]}
+            for oid, change in changes.items():
+                event = change["types"][dtpname]
+                if event is Event.Delete:
+                    self._remove_from_indexes(dtpname, oid)
+                    continue
+                if oid not in records:
+                    continue
+                if event is Event.New:
+                    for oids in updates.values():
+                        oids.append(oid)
+                    continue
+                seen = set()
+                for dimname in change.get("dims", ()):
+                    for index in dim_indexes.get(dimname, ()):
+                        if index not in seen:
+                            seen.add(index)
+                            updates[index].append(oid)
+            for index, oids in updates.items():
+                if oids:
+                    self._update_index_many(dtpname, index, oids)
+
+    # Storage of the objects. Overridden by other heap layouts.
+
+    def _read_dims(self, dtpname, oid):
+        dims = self.data[dtpname][oid]["dims"]
+        return {
+            dimname: dims.get(dimname)
+            for dimname in self.stored_dims[dtpname]}
+
+    def _insert(self, dtpname, oid, dim_map):
+        self.data[dtpname][oid] = {
+            "dims": dim_map, "types": {dtpname: Event.New}}
+
+    def _remove(self, dtpname, oid):
+        del self.data[dtpname][oid]
+
+    def _apply(self, data):
+        # Same result as merge_state_delta(self.data, data, delete_it=True)
+        # but in place, so a checkout only touches the changed records.
+        for dtpname, changes in data.items():
+            records = self.data.setdefault(dtpname, dict())
+            for oid, change in changes.items():
+                event = change["types"][dtpname]
+                if event is Event.Delete:
+                    records.pop(oid, None)
+                    continue
+                record = records.get(oid)
+                if record is None:
+                    # Copied, the change is kept as last_changes.
+                    records[oid] = {
+                        "dims": dict(change.get("dims", ())),
+                        "types": dict(change["types"])}
+                    continue
+                record["dims"].update(change.get("dims", ()))
+                types = record["types"]
+                for tpname, new_event in change["types"].items():
+                    if (new_event is Event.Delete
+                            or types.get(tpname) is not Event.New):
+                        types[tpname] = new_event
+
+    def _read_columns(self, dtpname, dimnames, oids=None):
+        records = self.data[dtpname]
+        oids = list(records) if oids is None else oids
+        return oids, {
+            dimname: [records[oid]["dims"].get(dimname) for oid in oids]
+            for dimname in dimnames}
+
+    def _write_column(self, dtpname, dimname, oids, values):
+        records = self.data[dtpname]
+        for oid, value in zip(oids, values):
+            records[oid]["dims"][dimname] = value
+
+    def _get_record(self, dtpname, oid):
+        record = self.data[dtpname].get(oid)
+        return record["dims"] if record and "dims" in record else dict()
+
+    def _read_dimension(self, dtpname, oid, dimname):
+        return self._get_record(dtpname, oid).get(dimname)
+
+    def _write_dimension(self, dtpname, oid, dimname, value):
+        self.data[dtpname][oid]["dims"][dimname] = value
+
     def _get_next_version(self):
         return [self.version, self.diff.version]
 
     def _extract_new_version(self, version):
         return version[1]
 
+    def _moving_records(self, move):
+        # Runs move with the write lock held. Readers without the lock
+        # see the epoch as None or changed, and read again with it.
+        self.epoch = None
+        try:
+            move()
+        finally:
+            self.epoch = object()
+
     def receive_data(self, data, version):
         with self.access_lock.gen_wlock():
+            self.last_members = {
+                tpname: {
+                    oid for oid in data.get(subset.storage, ())
+                    if oid in subset}
+                for tpname, subset in self.subsets.items()}
+            self.last_changes = data
             if data:
                 deleted_oids = utils.get_deleted(data)
                 for tpname, oid in deleted_oids:
                     self._release_control(self.type_map[tpname], oid)
-                self.data = utils.merge_state_delta(
-                    self.data, data, delete_it=True)
+                # Reverting to a value from before the checkout is a change.
+                self.diff.rebase(data)
+
+                def move():
+                    self._apply(data)
+                    self._index_changes(data)
+                self._moving_records(move)
             self.version = self._extract_new_version(version)
-            return True
+        if data:
+            for tpname, callbacks in list(self.listeners.items()):
+                changes = self.changes_since_last_checkout(
+                    self.type_map[tpname])
+                if changes:
+                    for callback in callbacks:
+                        callback(changes)
+        return True
+
+    def on_change(self, dtype, callback):
+        self.listeners.setdefault(
+            dtype.__r_meta__.name, list()).append(callback)
+
+    def changes_since_last_checkout(self, dtype):
+        dtpname = dtype.__r_meta__.name
+        if dtpname not in self.type_map:
+            return list()
+        storage = self.storage_name[dtpname]
+        decode_obj = dtype.__r_meta__.decode_obj
+        with self.access_lock.gen_rlock():
+            subset = self.subsets.get(dtpname)
+            was_member = self.last_members.get(dtpname, ())
+            changes = list()
+            for oid, change in self.last_changes.get(storage, dict()).items():
+                event = change["types"][storage]
+                if subset is not None:
+                    # Joining or leaving the subset is a New or a Delete.
+                    if oid in subset:
+                        if oid not in was_member:
+                            event = Event.New
+                    elif oid in was_member:
+                        event = Event.Delete
+                    else:
+                        continue
+                if event is Event.Delete:
+                    changes.append((oid, event, dict()))
+                    continue
+                changes.append((oid, event, decode_obj(
+                    change.get("dims", dict()), self)))
+            return changes
 
     def retreive_data(self):
         with self.access_lock.gen_wlock():
             if self.diff:
+                self.diff.detach()
                 final_diff = Diff(
                     utils.merge_state_delta(self.pending_commit, self.diff))
                 final_diff.version = self.diff.version
@@ -88,24 +488,398 @@ class ManagedHeap(object):
 
     def read_one(self, dtype, oid):
         dtpname = dtype.__r_meta__.name
+        # Tracked objects are released before they are removed, so a hit
+        # does not need the lock. This keeps foreign key reads cheap.
+        # This is tracked.get, inlined.
+        obj = dict.get(self.tracked_objs.get(dtpname, dict()), oid)
+        if type(obj) is KeyedRef:
+            obj = obj()
+        if obj is not None:
+            return obj
         with self.access_lock.gen_rlock():
             if self._exists(dtype, oid):
-                if oid in self.tracked_objs[dtpname]:
-                    return self.tracked_objs[dtpname][oid]
-                return self._take_control(dtpname, utils.make_obj(dtype, oid))
+                return self._get_obj(dtype, oid)
             return None
 
+    def _get_obj(self, dtype, oid):
+        dtpname = dtype.__r_meta__.name
+        obj = self.tracked_objs[dtpname].get(oid)
+        if obj is not None:
+            return obj
+        return self._take_control(dtpname, utils.make_obj(dtype, oid))
+
+    def resident(self, dtype):
+        '''Number of proxies of the type that are alive, and of rows in
+           the table of objects that are not in a dataframe.'''
+        dtpname = dtype.__r_meta__.name
+        return {
+            "proxies": len(self.tracked_objs.get(dtpname, ())),
+            "table_rows": len(dtype.__r_table__.object_table)}
+
+    def read_by(self, dtype, dimname, value):
+        dtpname = dtype.__r_meta__.name
+        if dtpname not in self.type_map:
+            return list()
+        storage = self.storage_name[dtpname]
+        key = index_key(dtype.__r_meta__.dimmap[dimname].encode(value))
+        with self.access_lock.gen_rlock():
+            index = self.hash_indexes[storage].get(dimname)
+            if index is not None:
+                oids = index.lookup(key)
+            else:
+                oids = [
+                    oid for oid in self._oids(dtype)
+                    if index_key(self._read_dimension(
+                        storage, oid, dimname)) == key]
+            if dtpname in self.subsets:
+                oids = [oid for oid in oids if oid in self.subsets[dtpname]]
+            return [self._get_obj(dtype, oid) for oid in oids]
+
+    def _resolve(self, dtype, dimname, objs):
+        # Referents of dimname for each obj, the lock must be held.
+        ref_type = dtype.__r_meta__.dimmap[dimname].dim_type
+        if not getattr(ref_type, "__r_meta__", None):
+            raise TypeError("{0} is not a foreign key.".format(dimname))
+        dtpname = self._storage(dtype)
+        ref_tpname = ref_type.__r_meta__.name
+        tracked = self.tracked_objs.get(ref_tpname, dict())
+        refs = list()
+        for obj in objs:
+            record = self._get_record(dtpname, obj.__r_oid__)
+            if getattr(obj, "__r_df__", None) is self:
+                obj.__r_record__ = (self.epoch, record)
+            value = record.get(dimname)
+            if value is None:
+                refs.append(None)
+                continue
+            ref = tracked.get(value[1])
+            if ref is None:
+                if self._exists(ref_type, value[1]):
+                    ref = self._take_control(
+                        ref_tpname, utils.make_obj(ref_type, value[1]))
+                else:
+                    # Not in the dataframe, same as the attribute read.
+                    ref = utils.make_obj(ref_type, value[1])
+            refs.append(ref)
+        return refs
+
+    def _join_keys(self, dtype, dimname):
+        # (oid, key) for each object of dtype, the lock must be held.
+        oids, columns = self._read_oid_columns(dtype, [dimname])
+        return zip(oids, map(index_key, columns[dimname]))
+
+    def _join_lookup(self, dtype, dimname):
+        # key -> oids of the objects of dtype with that key in dimname.
+        dtpname = dtype.__r_meta__.name
+        storage = self._storage(dtype)
+        index = self.hash_indexes[storage].get(dimname)
+        if index is not None and dtpname not in self.subsets:
+            return index.oids_by_value
+        table = dict()
+        for oid, key in self._join_keys(dtype, dimname):
+            table.setdefault(key, list()).append(oid)
+        return table
+
+    def join(self, left, left_dim, right, right_dim=None):
+        if (left.__r_meta__.name not in self.type_map
+                or right.__r_meta__.name not in self.type_map):
+            return list()
+        with self.access_lock.gen_rlock():
+            pairs = list()
+            if right_dim is None:
+                ref_type = left.__r_meta__.dimmap[left_dim].dim_type
+                ref_meta = getattr(ref_type, "__r_meta__", None)
+                if (not ref_meta
+                        or ref_meta.root is not right.__r_meta__.root):
+                    raise TypeError(
+                        "{0} is not a foreign key to {1}.".format(
+                            left_dim, right.__r_meta__.name))
+                right_oids = self._oids(right)
+                index = self.hash_indexes[self._storage(left)].get(left_dim)
+                if index is not None and len(right_oids) < len(
+                        self._oids(left)):
+                    # Probe the index of the left side with each right oid.
+                    left_oids = self._oids(left)
+                    for roid in right_oids:
+                        for loid in index.lookup(
+                                [Datatype.FOREIGNKEY, roid]):
+                            if loid in left_oids:
+                                pairs.append((loid, roid))
+                else:
+                    oids, columns = self._read_oid_columns(left, [left_dim])
+                    for loid, value in zip(oids, columns[left_dim]):
+                        if value is not None and value[1] in right_oids:
+                            pairs.append((loid, value[1]))
+            else:
+                table = self._join_lookup(right, right_dim)
+                for loid, key in self._join_keys(left, left_dim):
+                    if key is not None:
+                        for roid in table.get(key, ()):
+                            pairs.append((loid, roid))
+            return list(zip(
+                self._get_objs(left, [loid for loid, _ in pairs]),
+                self._get_objs(right, [roid for _, roid in pairs])))
+
+    def _range_index(self, dtype, dimname):
+        # The lock must be held. Without an index, one is built.
+        storage = self._storage(dtype)
+        index = self.range_indexes[storage].get(dimname)
+        if index is None:
+            index = RangeIndex(dimname)
+            for oid in self._oids(dtype):
+                index.update(oid, self._get_record(storage, oid))
+        return index
+
+    def read_range(self, dtype, dimname, lo=None, hi=None):
+        dtpname = dtype.__r_meta__.name
+        if dtpname not in self.type_map:
+            return list()
+        encode = dtype.__r_meta__.dimmap[dimname].encode
+        with self.access_lock.gen_rlock():
+            oids = self._range_index(dtype, dimname).between(
+                encode(lo), encode(hi))
+            if dtpname in self.subsets:
+                oids = [oid for oid in oids if oid in self.subsets[dtpname]]
+            return [self._get_obj(dtype, oid) for oid in oids]
+
+    def read_top(self, dtype, dimname, k):
+        dtpname = dtype.__r_meta__.name
+        if dtpname not in self.type_map:
+            return list()
+        with self.access_lock.gen_rlock():
+            objs = list()
+            for oid in self._range_index(dtype, dimname).descending():
+                if len(objs) >= k:
+                    break
+                if dtpname not in self.subsets or oid in self.subsets[dtpname]:
+                    objs.append(self._get_obj(dtype, oid))
+            return objs
+
+    def _grid_index(self, dtype, dims):
+        # The lock must be held. Without an index, one is built.
+        storage = self._storage(dtype)
+        grids = self.grid_indexes[storage]
+        if dims is None:
+            if len(grids) != 1:
+                raise TypeError(
+                    "Give the dims to search, {0} has {1} grids.".format(
+                        dtype.__r_meta__.name, len(grids)))
+            return list(grids.values())[0]
+        index = grids.get(tuple(dims))
+        if index is None:
+            index = GridIndex(dims[0], dims[1], 1.0)
+            for oid in self._oids(dtype):
+                index.update(oid, self._get_record(storage, oid))
+        return index
+
+    def _read_grid(self, dtype, dims, query):
+        dtpname = dtype.__r_meta__.name
+        if dtpname not in self.type_map:
+            return list()
+        with self.access_lock.gen_rlock():
+            oids = query(self._grid_index(dtype, dims))
+            if dtpname in self.subsets:
+                oids = [oid for oid in oids if oid in self.subsets[dtpname]]
+            return self._get_objs(dtype, oids)
+
+    def read_within(self, dtype, bbox, dims=None):
+        return self._read_grid(
+            dtype, dims, lambda index: index.within(*bbox))
+
+    def read_near(self, dtype, point, radius, dims=None):
+        return self._read_grid(
+            dtype, dims, lambda index: index.near(point[0], point[1], radius))
+
+    def _aggregate(self, dtype, func, dimname, group_by):
+        dtpname = dtype.__r_meta__.name
+        key = (dtpname, func, dimname, group_by)
+        aggregate = self.aggregates.get(key)
+        if aggregate is not None:
+            return aggregate
+        for name in (dimname, group_by):
+            if name is not None and name not in dtype.__r_meta__.dimmap:
+                raise KeyError("{0} is not a dimension of {1}.".format(
+                    name, dtpname))
+        aggregate = Aggregate(
+            func, dimname=dimname, group_by=group_by,
+            subset=self.subsets.get(dtpname))
+        with self.access_lock.gen_wlock():
+            if key not in self.aggregates:
+                storage = self._storage(dtype)
+                for oid in self._oids(dtype):
+                    aggregate.update(oid, self._get_record(storage, oid))
+                self._add_index(storage, aggregate)
+                self.aggregates[key] = aggregate
+            return self.aggregates[key]
+
+    def read_aggregate(self, dtype, func, dimname=None, group_by=None):
+        if dtype.__r_meta__.name not in self.type_map:
+            return dict() if group_by else Aggregate(func, dimname).result()
+        aggregate = self._aggregate(dtype, func, dimname, group_by)
+        with self.access_lock.gen_rlock():
+            if group_by is None:
+                return aggregate.result()
+            decode = dtype.__r_meta__.dimmap[group_by].decode
+            return {
+                decode(key_value(group), self): aggregate.result(group)
+                for group in aggregate.groups()}
+
+    def resolve(self, dtype, objs, dimname):
+        with self.access_lock.gen_rlock():
+            return self._resolve(dtype, dimname, objs)
+
+    def prefetch(self, dtype, objs, depth=1, dimnames=None):
+        with self.access_lock.gen_rlock():
+            level = {dtype: list(objs)}
+            for hop in range(depth):
+                next_level = dict()
+                for tp, tp_objs in level.items():
+                    fk_dims = (
+                        dimnames if hop == 0 and dimnames is not None else
+                        [dimname
+                         for dimname, dim_obj in tp.__r_meta__.dimmap.items()
+                         if getattr(dim_obj.dim_type, "__r_meta__", None)])
+                    for dimname in fk_dims:
+                        ref_type = tp.__r_meta__.dimmap[dimname].dim_type
+                        refs = next_level.setdefault(ref_type, dict())
+                        for ref in self._resolve(tp, dimname, tp_objs):
+                            if getattr(ref, "__r_df__", None) is self:
+                                refs[ref.__r_oid__] = ref
+                level = {
+                    tp: list(refs.values())
+                    for tp, refs in next_level.items() if refs}
+                for tp, tp_objs in level.items():
+                    # Cache the records, as the first attribute read would.
+                    tpname = self._storage(tp)
+                    for obj in tp_objs:
+                        record = self._get_record(tpname, obj.__r_oid__)
+                        obj.__r_record__ = (self.epoch, record)
+
+    def _get_objs(self, dtype, oids):
+        # _get_obj for many oids, the lock must be held.
+        tracked = self.tracked_objs[dtype.__r_meta__.name]
+        get = dict.get
+        objs = list()
+        new_oids, new_objs = list(), list()
+        for oid in oids:
+            # Same as tracked.get, inlined.
+            obj = get(tracked, oid)
+            if type(obj) is KeyedRef:
+                obj = obj()
+            if obj is None:
+                # Same as make_obj and _take_control, inlined.
+                obj = object.__new__(dtype)
+                obj.__r_oid__ = oid
+                obj.__r_df__ = self
+                new_oids.append(oid)
+                new_objs.append(obj)
+            objs.append(obj)
+        if new_objs:
+            tracked.add_many(new_oids, new_objs)
+        return objs
+
     def read_all(self, dtype):
         dtpname = dtype.__r_meta__.name
         with self.access_lock.gen_rlock():
-            if dtpname not in self.data:
+            if dtpname not in self.tracked_objs:
                 return list()
-            return [
-                (self.tracked_objs[dtpname][oid]
-                if oid in self.tracked_objs[dtpname] else
-                self._take_control(dtpname, utils.make_obj(dtype, oid)))
-                for oid in self.data[dtpname]
-            ]
+            return self._get_objs(dtype, self._oids(dtype))
+
+    def _decode_columns(self, dtype, columns):
+        dimmap = dtype.__r_meta__.dimmap
+        return {
+            dimname: decode_column(dimmap[dimname], values, self)
+            for dimname, values in columns.items()}
+
+    def _write_encoded_column(self, dtype, dimname, oids, values):
+        for oid in oids:
+            if not self._exists(dtype, oid):
+                raise KeyError(
+                    "Obj ({0}, {1}) does not exist in dataframe.".format(
+                        dtype.__r_meta__.name, oid))
+        dtpname = self._storage(dtype)
+        stype = self.type_map[dtpname]
+        # Writes of the value already stored are not recorded.
+        bases = self._read_columns(dtpname, [dimname], oids)[1][dimname]
+        written = [
+            i for i, (oid, value, base) in enumerate(zip(oids, values, bases))
+            if not same_value(value, base)
+            or self.diff.has_new_value(stype, oid, dimname)]
+        if len(written) < len(oids):
+            oids = [oids[i] for i in written]
+            values = [values[i] for i in written]
+            bases = [bases[i] for i in written]
+        self.diff.write_column(stype, dimname, oids, values, bases)
+        self._write_column(dtpname, dimname, oids, values)
+        if self.dim_indexes[dtpname].get(dimname):
+            for oid in oids:
+                self._update_indexes(dtpname, oid, [dimname])
+
+    def _read_oid_columns(self, dtype, dimnames):
+        dtpname = dtype.__r_meta__.name
+        if dtpname in self.subsets:
+            return self._read_columns(
+                self.storage_name[dtpname], dimnames,
+                list(self.subsets[dtpname]))
+        return self._read_columns(self._storage(dtype), dimnames)
+
+    def read_columns(self, dtype, dimnames):
+        with self.access_lock.gen_rlock():
+            if dtype.__r_meta__.name not in self.type_map:
+                oids, columns = list(), {
+                    dimname: list() for dimname in dimnames}
+            else:
+                oids, columns = self._read_oid_columns(dtype, dimnames)
+        return oids, self._decode_columns(dtype, columns)
+
+    def write_column(self, dtype, dimname, oids, values):
+        dim_obj = dtype.__r_meta__.dimmap[dimname]
+        if dim_obj.is_primary:
+            raise ValueError("Cannot bulk write the primary key.")
+        oids = oids.tolist() if hasattr(oids, "tolist") else list(oids)
+        values = encode_column(dim_obj, values)
+        if len(oids) != len(values):
+            raise ValueError(
+                "Got {0} values for {1} objects.".format(
+                    len(values), len(oids)))
+        with self.access_lock.gen_wlock():
+            self._write_encoded_column(dtype, dimname, oids, values)
+
+    def update_where(self, dtype, dimname, update, where=None, dimnames=None):
+        dim_obj = dtype.__r_meta__.dimmap[dimname]
+        if dim_obj.is_primary:
+            raise ValueError("Cannot bulk write the primary key.")
+        with self.access_lock.gen_wlock():
+            oids, columns = self._read_oid_columns(
+                dtype, dimnames or [dimname])
+            columns = self._decode_columns(dtype, columns)
+            if where is not None:
+                mask = where(columns)
+                oids = [oid for oid, keep in zip(oids, mask) if keep]
+                columns = {
+                    name: select(values, mask)
+                    for name, values in columns.items()}
+            values = encode_column(dim_obj, update(columns))
+            if len(oids) != len(values):
+                raise ValueError(
+                    "Got {0} values for {1} objects.".format(
+                        len(values), len(oids)))
+            self._write_encoded_column(dtype, dimname, oids, values)
+            return len(oids)
+
+    def view(self, dtype):
+        with self.access_lock.gen_rlock():
+            return ObjectView(self, dtype, list(self._oids(dtype)))
+
+    def _new_dims(self, dtype, obj):
+        # A new object has its dims in the table of its type, one that is
+        # in another dataframe has them in that heap.
+        owner = getattr(obj, "__r_df__", None)
+        if owner is None or owner is self:
+            return dtype.__r_table__[obj.__r_oid__]
+        # Read before taking our lock, so heaps never wait on each other.
+        with owner.access_lock.gen_rlock():
+            return owner._read_dims(owner._storage(dtype), obj.__r_oid__)
 
     def add_one(self, dtype, obj):
         dtpmeta = dtype.__r_meta__
@@ -114,72 +888,115 @@ class ManagedHeap(object):
             raise TypeError("Cannot add new object that is not a pcc_set")
 
         oid = obj.__r_oid__
+        dim_map = self._new_dims(dtype, obj)
         with self.access_lock.gen_wlock():
             if dtpname in self.data and oid in self.data[dtpname]:
                 raise ValueError(
                     "Obj ({0}, {1}) already exists in dataframe.".format(
                         dtpname, oid))
-            dim_map = dtype.__r_table__[obj.__r_oid__]
-            self.data[dtpname][oid] = {
-                "dims": dim_map, "types": {dtpname: Event.New}}
-            self.diff.add(dtype, [obj])
+            self._insert(dtpname, oid, dim_map)
+            self._update_indexes(dtpname, oid)
+            self.diff.add(dtype, [oid], [dim_map])
             self._take_control(dtpname, obj)
+            # The heap holds the dims now.
+            dtype.__r_table__.delete_obj(oid)
 
     def add_many(self, dtype, objs):
-        dtpname = dtype.__r_meta__.name
+        dtpmeta = dtype.__r_meta__
+        dtpname = dtpmeta.name
+        if dtpmeta.rtype is not Rtype.SET:
+            raise TypeError("Cannot add new object that is not a pcc_set")
+        oids = [obj.__r_oid__ for obj in objs]
+        dim_maps = [self._new_dims(dtype, obj) for obj in objs]
         with self.access_lock.gen_wlock():
-            for obj in objs:
-                oid = obj.__r_oid__
+            for oid, dim_map in zip(oids, dim_maps):
                 if dtpname in self.data and oid in self.data[dtpname]:
                     raise ValueError(
                         "Obj ({0}, {1}) already exists in dataframe.".format(
                             dtpname, oid))
-                dim_map = dtype.__r_table__[obj.__r_oid__]
-                self.data[dtpname][oid] = {
-                    "dims": dim_map, "types": {dtpname: Event.New}}
-            self.diff.add(dtype, objs)
+                self._insert(dtpname, oid, dim_map)
+            for index in self.indexes[dtpname]:
+                self._update_index_many(dtpname, index, oids)
+            self.diff.add(dtype, oids, dim_maps)
+            table = dtype.__r_table__
             for obj in objs:
                 self._take_control(dtpname, obj)
+                table.delete_obj(obj.__r_oid__)
 
-    def delete_one(self, dtype, obj):
+    def _delete(self, dtype, obj):
         oid = obj.__r_oid__
-        dtpname = dtype.__r_meta__.name
+        dtpname = self._storage(dtype)
+        self._release_control(dtype, oid)
+        assert obj.__r_df__ is None
+        in_prev = oid in self.data[dtpname]
+        self.diff.delete(self.type_map[dtpname], oid, in_prev)
+        self._remove_from_indexes(dtpname, oid)
+        self._remove(dtpname, oid)
+
+    def delete_one(self, dtype, obj):
         with self.access_lock.gen_wlock():
-            self._release_control(dtype, oid)
-            assert obj.__r_df__ is None
-            in_prev = self._exists(dtype, oid)
-            self.diff.delete(dtype, oid, in_prev)
-            del self.data[dtpname][oid]
+            self._moving_records(lambda: self._delete(dtype, obj))
 
     def delete_all(self, dtype):
         objs = self.read_all(dtype)
-        dtpname = dtype.__r_meta__.name
-        with self.access_lock.gen_wlock():
+
+        def move():
             for obj in objs:
-                oid = obj.__r_oid__
-                self._release_control(dtype, oid)
-                assert obj.__r_df__ is None
-                in_prev = self._exists(dtype, oid)
-                self.diff.delete(dtype, oid, in_prev)
-                del self.data[dtpname][oid]
+                self._delete(dtype, obj)
+        with self.access_lock.gen_wlock():
+            self._moving_records(move)
+
+    def get_record(self, dtype, oid):
+        '''Returns the stored dims of an object as a mapping. It stays
+           valid as long as self.epoch is not replaced. The lock is only
+           taken if records are being moved.'''
+        epoch = self.epoch
+        if epoch is not None:
+            try:
+                record = self._get_record(self._storage(dtype), oid)
+                if self.epoch is epoch:
+                    return record
+            except (KeyError, IndexError):
+                pass
+        with self.access_lock.gen_rlock():
+            return self._get_record(self._storage(dtype), oid)
 
     def read_dimension(self, dtype, oid, dimname):
         # if self.diff.has_new_value(dtype, oid, dimname):
         #     return self.diff.read_dimension(dtype, oid, dimname)
-        dtpname = dtype.__r_meta__.name
+        dtpname = self._storage(dtype)
+        epoch = self.epoch
+        if epoch is not None and dtpname in self.data:
+            try:
+                value = self._read_dimension(dtpname, oid, dimname)
+                if self.epoch is epoch:
+                    return value
+            except (KeyError, IndexError):
+                pass
         with self.access_lock.gen_rlock():
-            if (dtpname in self.data
-                    and oid in self.data[dtpname] 
-                    and "dims" in self.data[dtpname][oid] 
-                    and dimname in self.data[dtpname][oid]["dims"]):
-                return self.data[dtpname][oid]["dims"][dimname]
+            if dtpname in self.data:
+                return self._read_dimension(dtpname, oid, dimname)
             return None
 
     def write_dimension(self, dtype, oid, dimname, value):
+        dtpname = self._storage(dtype)
         with self.access_lock.gen_wlock():
-            self.diff.write_dimension(dtype, oid, dimname, value)
-            dtpname = dtype.__r_meta__.name
-            self.data[dtpname][oid]["dims"][dimname] = value
+            stype = self.type_map[dtpname]
+            base = self._read_dimension(dtpname, oid, dimname)
+            # A pending write can differ from the heap after a checkout.
+            if (same_value(value, base)
+                    and not self.diff.has_new_value(stype, oid, dimname)):
+                return
+            self.diff.write_dimension(stype, oid, dimname, value, base)
+            self._write_dimension(dtpname, oid, dimname, value)
+            if dimname in self.dim_indexes[dtpname]:
+                self._update_indexes(dtpname, oid, [dimname])
 
     def reset_primary_key(self, dtype, oid, dim, value):
         pass
+
+
+def select(values, mask):
+    if isinstance(values, list):
+        return [value for value, keep in zip(values, mask) if keep]
+    return values[mask]
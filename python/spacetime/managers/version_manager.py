@@ -2,13 +2,15 @@ import asyncio
 import cbor
 import os
 import sys
-from uuid import uuid4
 from abc import ABCMeta, abstractmethod
 from multiprocessing import Process, Queue
 from threading import RLock
 from spacetime.managers.version_graph import Graph
+from spacetime.managers.indexes import (
+    subset_predicates, decode_columns, evaluate)
 import spacetime.utils.utils as utils
 from spacetime.utils.enums import Event, AutoResolve
+from rtypes.utils.enums import Rtype
 import time
 from spacetime.utils.rwlock import RWLockFair as RWLock
 from multiprocessing import RLock
@@ -24,10 +26,11 @@ class VersionManager():
             instrument=None):
         self.appname = appname
         self.types = types
-        self.type_map = {tp.__r_meta__.name: tp for tp in types}
+        self.type_map = {
+            tp.__r_meta__.name: tp for tp in utils.get_root_types(types)}
         self.tpnames = {
             tp.__r_meta__.name: tp.__r_meta__.name_chain
-            for tp in self.types
+            for tp in self.type_map.values()
         }
         self.version_graph = Graph()
         self.state_to_app = dict()
@@ -243,9 +246,7 @@ class VersionManager():
                 {"types": {dtpname: Event.Delete}})
 
     def make_temp_obj(self, version, dtype, oid, with_change=dict()):
-        obj = utils.container()
-        obj.__class__ = dtype
-        obj.__r_oid__ = oid
+        obj = utils.make_obj(dtype, oid)
         obj.__r_temp__ = {
             dimname: (
                 with_change["dims"][dimname]
@@ -335,12 +336,130 @@ class VersionManager():
             return self.tpnames
         final_tpnames = list()
         for tp_group in req_types.values():
-            for tpname in tp_group:
-                if tpname in self.type_map:
-                    final_tpnames.append(tpname)
-                    break
+            # Objects are stored with the root pcc_set, the last in the
+            # name chain.
+            if tp_group[-1] in self.type_map:
+                final_tpnames.append(tp_group[-1])
         return final_tpnames
 
+    def process_req_dependents(self, req_types):
+        '''For root types that are only requested through subsets or
+           projections, returns root -> the predicates of each requested
+           subset, and root -> the requested dims.'''
+        filters = dict()
+        projections = dict()
+        if req_types is None:
+            return filters, projections
+        dependents = dict()
+        for tp_group in req_types.values():
+            tpname = tp_group[-1]
+            if tpname not in self.type_map:
+                continue
+            type_graph = self.type_map[tpname].__r_meta__.type_graph
+            metas = {meta.name: meta for meta in type_graph.dependents}
+            # None for the root itself, or a dependent not known here.
+            dependents.setdefault(tpname, list()).append(
+                metas.get(tp_group[0]) if len(tp_group) > 1 else None)
+        for tpname, metas in dependents.items():
+            if None in metas:
+                continue
+            subsets = [
+                meta for meta in metas if meta.rtype is Rtype.SUBSET]
+            if len(subsets) == len(metas):
+                filters[tpname] = [
+                    subset_predicates(meta) for meta in subsets]
+            elif not subsets:
+                projections[tpname] = {
+                    dimname for meta in metas for dimname in meta.dimnames}
+        return filters, projections
+
+    def filter_subsets(self, version, merged, filters):
+        '''Keeps only the changes to objects that are in one of the
+           requested subsets. Objects that join a subset are sent whole,
+           and objects that leave it are sent as deletes.'''
+        for tpname, predicate_sets in filters.items():
+            if tpname not in merged:
+                continue
+            dtype = self.type_map[tpname]
+            dimmap = dtype.__r_meta__.dimmap
+            changes = merged[tpname]
+            pred_dims = {
+                dimname
+                for predicates in predicate_sets
+                for _, args, _ in predicates for dimname, _ in args}
+
+            def members(records):
+                columns = decode_columns(dimmap, pred_dims, records)
+                found = [False] * len(records)
+                for predicates in predicate_sets:
+                    found = [
+                        old or new for old, new in zip(found, evaluate(
+                            predicates, columns, len(records)))]
+                return found
+
+            # Objects created since version are not with the app yet.
+            olds = self._read_objects_at(version, dtype, {
+                oid: pred_dims for oid, change in changes.items()
+                if change["types"][tpname] is not Event.New})
+            oids = list(changes)
+            news = list()
+            for oid in oids:
+                change = changes[oid]
+                if change["types"][tpname] is Event.New:
+                    news.append(change["dims"])
+                else:
+                    new = dict(olds[oid])
+                    new.update(change.get("dims", ()))
+                    news.append(new)
+            old_oids = list(olds)
+            was_member = dict(zip(
+                old_oids, members([olds[oid] for oid in old_oids])))
+            kept = dict()
+            joined = list()
+            for oid, is_member in zip(oids, members(news)):
+                change = changes[oid]
+                event = change["types"][tpname]
+                if event is Event.New:
+                    if is_member:
+                        kept[oid] = change
+                elif event is Event.Delete:
+                    if was_member[oid]:
+                        kept[oid] = change
+                elif is_member and was_member[oid]:
+                    kept[oid] = change
+                elif is_member:
+                    joined.append(oid)
+                elif was_member[oid]:
+                    kept[oid] = {"types": {tpname: Event.Delete}}
+            dimnames = dtype.__r_meta__.dimnames
+            fulls = self._read_objects_at(
+                version, dtype, {oid: dimnames for oid in joined})
+            for oid in joined:
+                fulls[oid].update(changes[oid]["dims"])
+                kept[oid] = {"types": {tpname: Event.New}, "dims": fulls[oid]}
+            merged[tpname] = kept
+        return merged
+
+    def project(self, merged, projections):
+        '''Strips the dims that were not requested. Modifications left
+           with no dims are not sent.'''
+        for tpname, dimnames in projections.items():
+            if tpname not in merged:
+                continue
+            kept = dict()
+            for oid, change in merged[tpname].items():
+                if "dims" not in change:
+                    kept[oid] = change
+                    continue
+                dims = {
+                    dimname: value
+                    for dimname, value in change["dims"].items()
+                    if dimname in dimnames}
+                if dims or change["types"][tpname] is not Event.Modification:
+                    kept[oid] = {"types": change["types"], "dims": dims}
+            merged[tpname] = kept
+        return merged
+
     def retrieve_data(self, appname, version, req_types=None):
         if self.instrument:
             self.instrument.enable()
@@ -368,6 +487,11 @@ class VersionManager():
         except KeyError:
             print (self.state_to_app, self.app_to_state)
             raise
+        filters, projections = self.process_req_dependents(req_types)
+        if filters:
+            merged = self.filter_subsets(version, merged, filters)
+        if projections:
+            merged = self.project(merged, projections)
         return merged, [version, next_version]
 
     def data_sent_confirmed(self, app, version):
@@ -383,7 +507,7 @@ class VersionManager():
         elif change:
             t_new_merge, t_conflict_merge = self.operational_transform(
                 start_v, change, package, from_external)
-            merge_v = str(uuid4())
+            merge_v = utils.new_version()
             self.version_graph.continue_chain(start_v, end_v, package)
             self.version_graph.continue_chain(new_v, merge_v, t_new_merge)
             self.version_graph.continue_chain(end_v, merge_v, t_conflict_merge)
@@ -403,6 +527,34 @@ class VersionManager():
                     # Do not return a value.
                     break
 
+    def _read_objects_at(self, version, dtype, wanted):
+        # Like _read_dimension_at, for many dims of many objects in one
+        # walk. The walk runs to the end, stopping early would keep the
+        # read locks on the graph.
+        dtpname = dtype.__r_meta__.name
+        values = {oid: dict() for oid in wanted}
+        missing = {
+            oid: set(dimnames) for oid, dimnames in wanted.items()
+            if dimnames}
+        for _, change in self.version_graph[version::-1]:
+            if not missing or dtpname not in change:
+                continue
+            tp_change = change[dtpname]
+            if len(tp_change) < len(missing):
+                oids = [oid for oid in tp_change if oid in missing]
+            else:
+                oids = [oid for oid in missing if oid in tp_change]
+            for oid in oids:
+                obj_change = tp_change[oid]
+                found = missing[oid].intersection(obj_change.get("dims", ()))
+                for dimname in found:
+                    values[oid][dimname] = obj_change["dims"][dimname]
+                missing[oid].difference_update(found)
+                if (not missing[oid]
+                        or obj_change["types"][dtpname] is Event.Delete):
+                    del missing[oid]
+        return values
+
     def maintain(self, appname, end_v):
         if self.update_refs(appname, end_v):
             self.version_graph.maintain(self.state_to_app, utils.merge_state_delta)
@@ -4,7 +4,8 @@ from threading import Thread
 import cProfile
 
 from spacetime.dataframe import Dataframe
-from spacetime.utils.enums import VersionBy, ConnectionStyle, AutoResolve
+from spacetime.utils.enums import (
+    VersionBy, ConnectionStyle, AutoResolve, HeapStyle)
 
 def get_details(dataframe):
     if isinstance(dataframe , Dataframe):
@@ -50,7 +51,8 @@ def get_app(func, types, producer,
                 self, appname, dataframe=None, server_port=0,
                 instrument=None, dump_graph=None,
                 connection_as=ConnectionStyle.TSocket, resolver=None,
-                autoresolve=AutoResolve.FullResolve, mem_instrument=False):
+                autoresolve=AutoResolve.FullResolve, mem_instrument=False,
+                heap_as=HeapStyle.Row):
             self._port = None
             self.appname = appname
             self.producer = producer
@@ -74,6 +76,7 @@ def get_app(func, types, producer,
             self.autoresolve = autoresolve
             self._ret_value = Queue()
             self.mem_instrument = mem_instrument
+            self.heap_as = heap_as
             super().__init__()
             self.daemon = False
 
@@ -128,6 +131,7 @@ def get_app(func, types, producer,
                 resolver=self.resolver,
                 autoresolve=self.autoresolve,
                 mem_instrument=self.mem_instrument,
+                heap_as=self.heap_as,
                 instrument=self.cr)
             #print(self.appname, self.all_types, details, df.details)
             return df
@@ -158,7 +162,8 @@ def Node(
         threading=False,
         instrument=None, dump_graph=None,
         connection_as=ConnectionStyle.TSocket, resolver=None,
-        autoresolve=AutoResolve.FullResolve, mem_instrument=False):
+        autoresolve=AutoResolve.FullResolve, mem_instrument=False,
+        heap_as=HeapStyle.Row):
     if not appname:
         appname = "{0}_{1}".format(target.__name__, str(uuid4()))
     app_cls = get_app(
@@ -168,4 +173,5 @@ def Node(
         appname, dataframe=dataframe, server_port=server_port,
         instrument=instrument, dump_graph=dump_graph,
         connection_as=connection_as, resolver=resolver,
-        autoresolve=autoresolve, mem_instrument=mem_instrument)
+        autoresolve=autoresolve, mem_instrument=mem_instrument,
+        heap_as=heap_as)
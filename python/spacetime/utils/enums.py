@@ -11,6 +11,7 @@ class TransferFields(object):
     WaitTimeout = 5
     Status = 6
     Types = 7
+    Buffers = 8
 
 class Event(object):
     New = 0
@@ -28,6 +29,10 @@ class ConnectionStyle(object):
     NPSocket = 1
     AIOSocket = 2
 
+class HeapStyle(object):
+    Row = 0
+    Columnar = 1
+
 class AutoResolve(object):
     FullResolve = 0
     BranchConflicts = 1
@@ -2,12 +2,26 @@ from struct import pack, unpack
 import traceback
 import cbor
 
+import spacetime.utils.enums as enums
+from spacetime.utils.utils import extract_buffers, insert_buffers
 
-async def send_data(writer, data):
+
+async def send_data(writer, data, buffer_dims=None):
     try:
+        buffers = list()
+        if buffer_dims and enums.TransferFields.Data in data:
+            payload, locations, buffers = extract_buffers(
+                data[enums.TransferFields.Data], buffer_dims)
+            if locations:
+                data = dict(data)
+                data[enums.TransferFields.Data] = payload
+                data[enums.TransferFields.Buffers] = locations
         raw_data = cbor.dumps(data)
         writer.write(pack("!L", len(raw_data)))
         writer.write(raw_data)
+        # ndarray buffers go as frames after the body.
+        for buffer in buffers:
+            writer.write(buffer)
         await writer.drain()
     except Exception as e:
         print (e)
@@ -33,8 +47,15 @@ async def recv_data(reader):
     try:
         con_succ = await reader.read(n=4)
         content_length = unpack("!L", con_succ)[0]
-        data = await read_all(reader, content_length)
-        return cbor.loads(data)
+        data = cbor.loads(await read_all(reader, content_length))
+        if enums.TransferFields.Buffers in data:
+            buffers = list()
+            for _, _, _, length in data[enums.TransferFields.Buffers]:
+                buffers.append(memoryview(await reader.readexactly(length)))
+            insert_buffers(
+                data[enums.TransferFields.Data],
+                data[enums.TransferFields.Buffers], buffers)
+        return data
     except Exception as e:
         print (e)
         print (con_succ)
@@ -2,12 +2,29 @@ import logging
 import os
 import time
 import cbor
+from itertools import count
+from uuid import uuid4
 
 from spacetime.utils.enums import Event
+from rtypes.utils.converter import is_buffer_type
+from rtypes.utils.enums import Rtype
 #from copy import deepcopy
 
-class container(object):
-    pass
+# Version ids are one random prefix per process and a counter. A uuid4
+# per version reads os.urandom, which releases the GIL, and a committing
+# thread then waits behind every busy reader thread to get it back.
+VERSION_IDS = [None, None]
+
+def seed_versions():
+    VERSION_IDS[:] = [str(uuid4()), count()]
+
+seed_versions()
+# A forked process must not repeat the versions of its parent.
+os.register_at_fork(after_in_child=seed_versions)
+
+def new_version():
+    prefix, counter = VERSION_IDS
+    return "{0}-{1}".format(prefix, next(counter))
 
 
 def get_logger(name):
@@ -31,61 +48,155 @@ def get_logger(name):
 def deepcopy(the_dict):
     # This is faster than actual deepcopy.
     #return the_dict
-    return cbor.loads(cbor.dumps(the_dict))
+    try:
+        return cbor.loads(cbor.dumps(the_dict))
+    except ValueError:
+        # cbor cannot encode the ndarray buffers.
+        return copy_containers(the_dict)
 
-def merge_state_delta(old_change, newer_change, delete_it=False):
-    merged = dict()
-    if old_change == dict():
-        return deepcopy(newer_change)
-    for dtpname in old_change:
-        if dtpname not in newer_change:
-            merged[dtpname] = (old_change[dtpname])
+def copy_containers(value):
+    # Copies dicts and lists, everything else is immutable and is shared.
+    if isinstance(value, dict):
+        return {k: copy_containers(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_containers(v) for v in value]
+    return value
+
+def get_root_types(types):
+    '''types and the pcc_sets that store the objects of its subsets.'''
+    all_types = list(types)
+    for tp in types:
+        if tp.__r_meta__.root not in all_types:
+            all_types.append(tp.__r_meta__.root)
+    return all_types
+
+def get_stored_dims(types):
+    '''root tpname -> the dims that its objects are stored with. A root
+       that is only declared through projections keeps the projected
+       dims.'''
+    projected = dict()
+    whole = set()
+    for tp in types:
+        tpname = tp.__r_meta__.root.__r_meta__.name
+        if tp.__r_meta__.rtype is Rtype.PROJECTION:
+            projected.setdefault(tpname, set()).update(tp.__r_meta__.dimnames)
         else:
+            whole.add(tpname)
+    stored_dims = dict()
+    for tp in get_root_types(types):
+        tpname = tp.__r_meta__.name
+        if tp.__r_meta__.root is not tp:
+            continue
+        stored_dims[tpname] = [
+            dimname for dimname in tp.__r_meta__.dimnames
+            if tpname in whole or dimname in projected[tpname]]
+    return stored_dims
+
+def get_buffer_dims(types):
+    buffer_dims = dict()
+    for tp in get_root_types(types):
+        if tp.__r_meta__.root is not tp:
+            # Subsets are sent as their root type.
+            continue
+        dimnames = [
+            dimname for dimname, dim_obj in tp.__r_meta__.dimmap.items()
+            if is_buffer_type(dim_obj.dim_type)]
+        if dimnames:
+            buffer_dims[tp.__r_meta__.name] = dimnames
+    return buffer_dims
+
+def extract_buffers(data, buffer_dims):
+    '''Takes the ndarray buffers out of data so that they can be sent
+       as frames after the cbor body. data itself is not modified.
+       Returns the stripped data, the buffer locations, and the buffers.'''
+    locations = list()
+    buffers = list()
+    stripped = None
+    for dtpname, dimnames in buffer_dims.items():
+        if dtpname not in data:
+            continue
+        tp_data = None
+        for oid, obj_change in data[dtpname].items():
+            if "dims" not in obj_change:
+                continue
+            dims = obj_change["dims"]
+            found = [
+                dimname for dimname in dimnames
+                if dimname in dims and dims[dimname] is not None]
+            if not found:
+                continue
+            if tp_data is None:
+                if stripped is None:
+                    stripped = dict(data)
+                tp_data = stripped[dtpname] = dict(data[dtpname])
+            new_dims = dict(dims)
+            for dimname in found:
+                value = dims[dimname]
+                buffer = memoryview(value[1])
+                new_dims[dimname] = [value[0], None] + value[2:]
+                locations.append([dtpname, oid, dimname, buffer.nbytes])
+                buffers.append(buffer)
+            tp_data[oid] = dict(obj_change)
+            tp_data[oid]["dims"] = new_dims
+    return (data if stripped is None else stripped), locations, buffers
+
+def insert_buffers(data, locations, buffers):
+    for (dtpname, oid, dimname, _), buffer in zip(locations, buffers):
+        data[dtpname][oid]["dims"][dimname][1] = buffer
+
+# Deltas passed to the merges are never changed. The merged delta shares
+# every type and object record that the newer change does not touch.
+
+def merge_state_delta(old_change, newer_change, delete_it=False):
+    if not old_change:
+        return dict(newer_change)
+    merged = dict(old_change)
+    for dtpname, tp_change in newer_change.items():
+        if dtpname in old_change:
             merged[dtpname] = merge_objectlist_deltas(
-                dtpname, old_change[dtpname], newer_change[dtpname],
+                dtpname, old_change[dtpname], tp_change,
                 delete_it=delete_it)
-    for dtpname in newer_change:
-        if dtpname not in old_change:
-            merged[dtpname] = deepcopy(newer_change[dtpname])
+        else:
+            merged[dtpname] = tp_change
     return merged
 
 def merge_objectlist_deltas(dtpname, old_change, new_change, delete_it=False):
-    merged = dict()
-    for oid in old_change:
-        if oid not in new_change:
-            merged[oid] = (old_change[oid])
-        else:
-            if delete_it and new_change[oid]["types"][dtpname] is Event.Delete:
-                # Do not include this object in the merged changes if
-                # delete is True
-                continue
-            if (old_change[oid]["types"][dtpname] is Event.New
-                    and new_change[oid]["types"][dtpname] is Event.Delete):
-                # Do not include this object as it was both created and deleted
-                # in these merged changes.
-                continue
-            obj_data = merge_object_delta(
-                dtpname, old_change[oid], new_change[oid])
-            if not obj_data:
-                obj_data = {"types": {dtpname: Event.Delete}}
-            merged[oid] = obj_data
-    for oid in new_change:
+    merged = dict(old_change)
+    for oid, new_obj_change in new_change.items():
+        new_event = new_obj_change["types"][dtpname]
         if oid not in old_change:
-            if delete_it and new_change[oid]["types"][dtpname] is Event.Delete:
+            if delete_it and new_event is Event.Delete:
                 continue
-            merged[oid] = deepcopy(new_change[oid])
+            merged[oid] = new_obj_change
+            continue
+        if delete_it and new_event is Event.Delete:
+            # Do not include this object in the merged changes if
+            # delete is True
+            del merged[oid]
+            continue
+        if (old_change[oid]["types"][dtpname] is Event.New
+                and new_event is Event.Delete):
+            # Do not include this object as it was both created and deleted
+            # in these merged changes.
+            del merged[oid]
+            continue
+        obj_data = merge_object_delta(
+            dtpname, old_change[oid], new_obj_change)
+        if not obj_data:
+            obj_data = {"types": {dtpname: Event.Delete}}
+        merged[oid] = obj_data
     return merged
 
 def merge_object_delta(dtpname, old_change, new_change):
     if not old_change:
-        return deepcopy(new_change)
+        return new_change
     if old_change["types"][dtpname] is Event.New and new_change["types"][dtpname] is Event.Delete:
         return None
     if new_change["types"][dtpname] is Event.Delete:
-        return deepcopy(new_change)
+        return new_change
     if (old_change["types"][dtpname] is Event.Delete
             and new_change["types"][dtpname] is Event.New):
-        return deepcopy(new_change)
+        return new_change
     if not (new_change["types"][dtpname] is Event.Modification 
             or (new_change["types"][dtpname] is Event.New 
                 and old_change["types"][dtpname] is Event.New)):
@@ -93,7 +204,7 @@ def merge_object_delta(dtpname, old_change, new_change):
             "Not sure why the new change does not have modification.")
     if old_change["types"][dtpname] is Event.Delete:
         return (old_change)
-    dim_change = (old_change["dims"])
+    dim_change = dict(old_change["dims"])
     dim_change.update(new_change["dims"])
     type_change = dict()
     for tpname, old_event in old_change["types"].items():
@@ -117,12 +228,14 @@ def merge_object_delta(dtpname, old_change, new_change):
     for tpname, new_event in new_change["types"].items():
         if tpname not in old_change["types"]:
             type_change[tpname] = new_event
+    if type_change == old_change["types"]:
+        type_change = old_change["types"]
 
     return {"types": type_change, "dims": dim_change}
 
 def make_obj(dtype, oid):
-    obj = container()
-    obj.__class__ = dtype
+    # Does not run __init__, and works for classes with __slots__.
+    obj = object.__new__(dtype)
     obj.__r_oid__ = oid
     return obj
 
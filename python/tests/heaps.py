@@ -0,0 +1,26 @@
+from rtypes import pcc_set, primarykey, dimension
+from spacetime.utils.enums import HeapStyle
+
+
+def on_both_heaps(check):
+    '''Makes a test that runs check(self, heap_as) on the row and on
+       the columnar heap.'''
+    def test(self):
+        for heap_as in (HeapStyle.Row, HeapStyle.Columnar):
+            with self.subTest(heap_as=heap_as):
+                check(self, heap_as)
+    return test
+
+
+@pcc_set
+class Point(object):
+    oid = primarykey(int)
+    x = dimension(int)
+    y = dimension(float)
+    label = dimension(str)
+
+    def __init__(self, oid, x, y, label):
+        self.oid = oid
+        self.x = x
+        self.y = y
+        self.label = label
@@ -3,7 +3,6 @@ import unittest
 import time
 
 from rtypes import pcc_set, primarykey, dimension
-from rtypes.utils.enums import Datatype
 
 from spacetime import Dataframe
 from spacetime.utils.enums import Event
@@ -47,33 +46,197 @@ class TestRtypes(unittest.TestCase):
         self.assertEqual(Car.__r_table__.obj_type, Car)
         self.assertDictEqual(
             Car.__r_table__.object_table, {0: {
-                "oid": {"type": Datatype.INTEGER, "value": 0},
-                "xvel": {"type": Datatype.INTEGER, "value": 0},
-                "yvel": {"type": Datatype.INTEGER, "value": 0},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 0,
+                "xvel": 0,
+                "yvel": 0,
+                "xpos": 0,
+                "ypos": 0
             }})
         c.xvel = 1
         self.assertDictEqual(
             Car.__r_table__.object_table, {0: {
-                "oid": {"type": Datatype.INTEGER, "value": 0},
-                "xvel": {"type": Datatype.INTEGER, "value": 1},
-                "yvel": {"type": Datatype.INTEGER, "value": 0},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 0,
+                "xvel": 1,
+                "yvel": 0,
+                "xpos": 0,
+                "ypos": 0
             }})
         c.oid = 1
         self.assertDictEqual(
             Car.__r_table__.object_table, {1: {
-                "oid": {"type": Datatype.INTEGER, "value": 1},
-                "xvel": {"type": Datatype.INTEGER, "value": 1},
-                "yvel": {"type": Datatype.INTEGER, "value": 0},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 1,
+                "xvel": 1,
+                "yvel": 0,
+                "xpos": 0,
+                "ypos": 0
             }})
         self.assertEqual(c.__r_oid__, 1)
         
+@pcc_set
+class SlotCar(object):
+    __slots__ = ("note",)
+    oid = primarykey(int)
+    xvel = dimension(int)
+    owner = dimension(Car)
+
+    def __init__(self, oid):
+        self.oid = oid
+        self.xvel = 0
+
+
+class Vehicle(object):
+    def __init__(self, oid):
+        self.wheels = 4
+
+    def describe(self):
+        return "vehicle"
+
+
+@pcc_set
+class SlotTruck(Vehicle):
+    __slots__ = ("wheels",)
+    oid = primarykey(int)
+    load = dimension(int)
+
+    def __init__(self, oid):
+        super().__init__(oid)
+        self.oid = oid
+        self.load = 0
+
+    @property
+    def kind(self):
+        return "truck " + super().describe()
+
+
+class TestSlots(unittest.TestCase):
+    def test_slots_super(self):
+        truck = SlotTruck(0)
+        self.assertEqual(4, truck.wheels)
+        self.assertEqual("truck vehicle", truck.kind)
+
+    def test_slots(self):
+        c = SlotCar(0)
+        self.assertFalse(hasattr(c, "__dict__"))
+        c.note = "free"
+        self.assertEqual("free", c.note)
+        with self.assertRaises(AttributeError):
+            c.other = 1
+        self.assertDictEqual(
+            {"oid": 0, "xvel": 0}, SlotCar.__r_table__.object_table[0])
+
+        df1 = Dataframe("TEST_SLOTS1", [Car, SlotCar])
+        df2 = Dataframe("TEST_SLOTS2", [Car, SlotCar], details=df1.details)
+        owner = Car(5)
+        df1.add_one(Car, owner)
+        df1.add_one(SlotCar, c)
+        c.xvel = 3
+        c.owner = owner
+        self.assertIs(c, df1.read_one(SlotCar, 0))
+        self.assertIs(owner, c.owner)
+        df1.commit()
+        df2.pull()
+        proxy = df2.read_all(SlotCar)[0]
+        self.assertIsInstance(proxy, SlotCar)
+        self.assertFalse(hasattr(proxy, "__dict__"))
+        self.assertEqual((0, 3, 5), (proxy.oid, proxy.xvel, proxy.owner.oid))
+        df2.delete_one(SlotCar, proxy)
+        self.assertEqual(3, proxy.xvel)
+
+
+@pcc_set
+class Bike(object):
+    oid = primarykey(int)
+
+    def __init__(self, oid):
+        self.oid = oid
+
+
+@pcc_set
+class Region(object):
+    oid = primarykey(int)
+
+    def __init__(self, oid):
+        self.oid = oid
+
+
+@pcc_set
+class Customer(object):
+    oid = primarykey(int)
+    region = dimension(Region)
+
+    def __init__(self, oid, region):
+        self.oid = oid
+        self.region = region
+
+
+@pcc_set
+class Order(object):
+    oid = primarykey(int)
+    customer = dimension(Customer)
+
+    def __init__(self, oid, customer):
+        self.oid = oid
+        self.customer = customer
+
+
+class TestForeignKeys(unittest.TestCase):
+    def test_resolve_prefetch(self):
+        df1 = Dataframe("TEST_FK1", [Region, Customer, Order])
+        regions = [Region(i) for i in range(2)]
+        customers = [Customer(i, regions[i % 2]) for i in range(4)]
+        df1.add_many(Region, regions)
+        df1.add_many(Customer, customers)
+        df1.add_many(Order, [Order(i, customers[i % 4]) for i in range(8)])
+        df1.add_one(Order, Order(8, Customer(9, regions[0])))
+        df1.commit()
+        df2 = Dataframe(
+            "TEST_FK2", [Region, Customer, Order], details=df1.details)
+        orders = sorted(df2.read_all(Order), key=lambda o: o.oid)
+        refs = df2.resolve(Order, orders, "customer")
+        self.assertListEqual(
+            [0, 1, 2, 3, 0, 1, 2, 3, 9], [c.__r_oid__ for c in refs])
+        self.assertIs(refs[0], orders[0].customer)
+        self.assertIs(refs[0], refs[4])
+        # Customer 9 was never added, so it is not attached.
+        self.assertFalse(hasattr(refs[8], "__r_df__"))
+        with self.assertRaises(TypeError):
+            df2.resolve(Customer, refs[:4], "oid")
+
+        df2.prefetch(Order, orders, depth=2)
+        tracked = df2.local_heap.tracked_objs
+        self.assertEqual(2, len(tracked[Region.__r_meta__.name]))
+        for region in tracked[Region.__r_meta__.name].values():
+            self.assertIs(df2.local_heap.epoch, region.__r_record__[0])
+        self.assertEqual(1, orders[5].customer.region.oid)
+
+
 class TestFullStateDataframeBasic(unittest.TestCase):
+    def test_view(self):
+        df1 = Dataframe("TEST_VIEW1", [Bike])
+        df1.add_many(Bike, [Bike(i) for i in range(4)])
+        df1.commit()
+        df = Dataframe("TEST_VIEW2", [Bike], details=df1.details)
+        tracked = df.local_heap.tracked_objs[Bike.__r_meta__.name]
+        view = df.view(Bike)
+        self.assertEqual(4, len(view))
+        self.assertIn(2, view)
+        self.assertDictEqual(dict(), tracked)
+        self.assertEqual(3, view[3].oid)
+        self.assertListEqual([3], list(tracked))
+        df.add_one(Bike, Bike(4))
+        self.assertEqual(4, len(view))
+        self.assertNotIn(4, view)
+        self.assertIn(df.read_one(Bike, 1), view)
+        df.delete_one(Bike, df.read_one(Bike, 0))
+        self.assertListEqual([1, 2, 3], sorted(c.oid for c in view))
+        # Deleted objects are gone from len, in and indexing too.
+        self.assertEqual(3, len(view))
+        self.assertNotIn(0, view)
+        self.assertListEqual([c.oid for c in view], [
+            view[i].oid for i in range(len(view))])
+        self.assertListEqual(
+            [1, 2, 3, 4], sorted(c.oid for c in df.iter_all(Bike)))
+
     def test_basic_delete2(self):
         df = Dataframe("TEST", [Car])
         c = Car(0)
@@ -386,11 +549,11 @@ def server_df1(send_q, recv_q, server_ready, client_ready):
     assert (c2.xvel == 2)
     assert (c2.yvel == 2)
     assert (Car.__r_table__.object_table[1] == {
-                "oid": {"type": Datatype.INTEGER, "value": 1},
-                "xvel": {"type": Datatype.INTEGER, "value": 2},
-                "yvel": {"type": Datatype.INTEGER, "value": 2},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 1,
+                "xvel": 2,
+                "yvel": 2,
+                "xpos": 0,
+                "ypos": 0
             })
     
     df.delete_one(Car, c3)
@@ -482,11 +645,11 @@ def client_df1(send_q, recv_q, server_ready, client_ready):
     #assert (c2.oid is 1)
     #assert (c2.__r_df__ is None)
     #assert (Car.__r_table__.object_table[1] == {
-    #            "oid": {"type": Datatype.INTEGER, "value": 0},
-    #            "xvel": {"type": Datatype.INTEGER, "value": 0},
-    #            "yvel": {"type": Datatype.INTEGER, "value": 0},
-    #            "xpos": {"type": Datatype.INTEGER, "value": 0},
-    #            "ypos": {"type": Datatype.INTEGER, "value": 0}
+    #            "oid": 0,
+    #            "xvel": 0,
+    #            "yvel": 0,
+    #            "xpos": 0,
+    #            "ypos": 0
     #        })
     # Setting point S3
     client_ready.set()
@@ -952,11 +1115,11 @@ def server_df5(send_q, recv_q, server_ready, client_ready):
     assert (c2.xvel == 2)
     assert (c2.yvel == 2)
     assert (Car.__r_table__.object_table[1] == {
-                "oid": {"type": Datatype.INTEGER, "value": 1},
-                "xvel": {"type": Datatype.INTEGER, "value": 2},
-                "yvel": {"type": Datatype.INTEGER, "value": 2},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 1,
+                "xvel": 2,
+                "yvel": 2,
+                "xpos": 0,
+                "ypos": 0
             })
     
     df.delete_one(Car, c3)
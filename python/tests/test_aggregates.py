@@ -0,0 +1,53 @@
+import unittest
+
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps
+from tests.test_indexes import Score
+
+
+class TestAggregate(unittest.TestCase):
+    @on_both_heaps
+    def test_aggregate(self, heap_as):
+        df1 = Dataframe("TEST_AGGREGATE1", [Score], heap_as=heap_as)
+        df2 = Dataframe(
+            "TEST_AGGREGATE2", [Score], details=df1.details, heap_as=heap_as)
+        scores = [Score(i, float(i)) for i in range(6)]
+        df1.add_many(Score, scores)
+        # points: 0 .. 5, level: oid % 3
+        self.assertEqual(6, df1.read_aggregate(Score, "count"))
+        self.assertEqual(15.0, df1.read_aggregate(Score, "sum", "points"))
+        self.assertEqual(5.0, df1.read_aggregate(Score, "max", "points"))
+        self.assertDictEqual(
+            {0: 1.5, 1: 2.5, 2: 3.5},
+            df1.read_aggregate(Score, "mean", "points", group_by="level"))
+        self.assertDictEqual(
+            {0: 0.0, 1: 1.0, 2: 2.0},
+            df1.read_aggregate(Score, "min", "points", group_by="level"))
+        scores[5].points = None
+        scores[0].level = 1
+        df1.delete_one(Score, scores[4])
+        self.assertEqual(6.0, df1.read_aggregate(Score, "sum", "points"))
+        self.assertEqual(3.0, df1.read_aggregate(Score, "max", "points"))
+        self.assertDictEqual(
+            {0: 3.0, 1: 0.0, 2: 2.0},
+            df1.read_aggregate(Score, "min", "points", group_by="level"))
+        self.assertDictEqual(
+            {0: 3.0, 1: 0.5, 2: 2.0},
+            df1.read_aggregate(Score, "mean", "points", group_by="level"))
+        with self.assertRaises(ValueError):
+            df1.read_aggregate(Score, "sum")
+        with self.assertRaises(KeyError):
+            df1.read_aggregate(Score, "sum", "none")
+        self.assertEqual(0, df2.read_aggregate(Score, "count"))
+        self.assertIsNone(df2.read_aggregate(Score, "min", "points"))
+        df1.commit()
+        df2.pull()
+        self.assertEqual(5, df2.read_aggregate(Score, "count"))
+        self.assertEqual(0.0, df2.read_aggregate(Score, "min", "points"))
+        df1.read_one(Score, 0).points = 7.0
+        df1.delete_one(Score, df1.read_one(Score, 1))
+        df1.commit()
+        df2.pull()
+        self.assertEqual(4, df2.read_aggregate(Score, "count"))
+        self.assertEqual(2.0, df2.read_aggregate(Score, "min", "points"))
+        self.assertEqual(12.0, df2.read_aggregate(Score, "sum", "points"))
@@ -0,0 +1,42 @@
+import unittest
+
+from spacetime import Dataframe
+from spacetime.utils.enums import Event
+from tests.heaps import on_both_heaps, Point
+
+
+class TestChangeFeed(unittest.TestCase):
+    @on_both_heaps
+    def test_changes(self, heap_as):
+        df1 = Dataframe("TEST_CHANGES1", [Point])
+        df2 = Dataframe(
+            "TEST_CHANGES2", [Point], details=df1.details, heap_as=heap_as)
+        received = list()
+        df2.on_change(Point, received.append)
+        df1.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(3)])
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [(1, Event.New, {"oid": 1, "x": 1, "y": 1.0, "label": "1"})],
+            [change for change in df2.changes_since_last_checkout(Point)
+             if change[0] == 1])
+        # Local writes do not show up in the changes of the checkout.
+        df2.read_one(Point, 0).x = 5
+        self.assertIn(
+            (0, Event.New, {"oid": 0, "x": 0, "y": 0.0, "label": "0"}),
+            df2.changes_since_last_checkout(Point))
+        df1.read_one(Point, 1).x = 10
+        df1.delete_one(Point, df1.read_one(Point, 2))
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [(1, Event.Modification, {"x": 10}), (2, Event.Delete, {})],
+            sorted(df2.changes_since_last_checkout(Point)))
+        self.assertEqual(2, len(received))
+        self.assertListEqual(
+            sorted(received[1]),
+            sorted(df2.changes_since_last_checkout(Point)))
+        # A checkout with nothing new has no changes.
+        df2.pull()
+        self.assertListEqual([], df2.changes_since_last_checkout(Point))
+        self.assertEqual(2, len(received))
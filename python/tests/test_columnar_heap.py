@@ -0,0 +1,81 @@
+import unittest
+from array import array
+
+from spacetime import Dataframe
+from spacetime.managers.columnar_heap import TypeColumns
+from spacetime.utils.enums import HeapStyle
+from tests.heaps import Point
+
+
+class TestTypeColumns(unittest.TestCase):
+    def test_insert_remove(self):
+        columns = TypeColumns(Point)
+        self.assertIsInstance(columns.columns["x"], array)
+        self.assertIsInstance(columns.columns["label"], list)
+        for i in range(3):
+            columns.insert(i, {"oid": i, "x": i, "y": i / 2, "label": str(i)})
+        columns.remove(0)
+        # The last row fills the hole.
+        self.assertListEqual([2, 1], columns.oids)
+        self.assertDictEqual(
+            {"oid": 2, "x": 2, "y": 1.0, "label": "2"}, columns.read_dims(2))
+        self.assertEqual(1, columns.read(1, "x"))
+        self.assertIsNone(columns.read(0, "x"))
+
+    def test_degrade_on_none(self):
+        columns = TypeColumns(Point)
+        columns.insert(0, {"oid": 0, "x": None, "y": 1.0, "label": "a"})
+        columns.write(0, "y", None)
+        self.assertIsInstance(columns.columns["x"], list)
+        self.assertIsInstance(columns.columns["y"], list)
+        self.assertIsNone(columns.read(0, "x"))
+        self.assertIsNone(columns.read(0, "y"))
+
+    def test_exact_types(self):
+        columns = TypeColumns(Point)
+        columns.insert(0, {"oid": 0, "x": 1, "y": 1.0, "label": "a"})
+        columns.write(0, "x", True)
+        columns.write_column("y", [0], [2])
+        self.assertIs(True, columns.read(0, "x"))
+        self.assertIs(int, type(columns.read(0, "y")))
+        self.assertIsInstance(columns.columns["y"], list)
+
+
+class TestColumnarDataframe(unittest.TestCase):
+    def test_basic(self):
+        df = Dataframe("TEST_COLUMNAR", [Point], heap_as=HeapStyle.Columnar)
+        df.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(5)])
+        p = df.read_one(Point, 3)
+        p.x += 10
+        self.assertEqual(13, p.x)
+        self.assertEqual(5, len(df.read_all(Point)))
+        with self.assertRaises(ValueError):
+            Dataframe("TEST_COLUMNAR_BAD", [Point], heap_as="Cells")
+        df.delete_one(Point, df.read_one(Point, 0))
+        self.assertIsNone(df.read_one(Point, 0))
+        self.assertListEqual(
+            [1, 2, 3, 4], sorted(p.oid for p in df.read_all(Point)))
+        df.commit()
+        self.assertEqual(13, df.read_one(Point, 3).x)
+
+    def test_push_pull(self):
+        df1 = Dataframe("TEST_COLUMNAR1", [Point])
+        df2 = Dataframe(
+            "TEST_COLUMNAR2", [Point], details=df1.details,
+            heap_as=HeapStyle.Columnar)
+        df3 = Dataframe(
+            "TEST_COLUMNAR3", [Point], details=df1.details,
+            heap_as=HeapStyle.Columnar)
+        df2.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(3)])
+        df2.sync()
+        df3.pull()
+        self.assertEqual("2", df3.read_one(Point, 2).label)
+        df3.read_one(Point, 1).y = 5.5
+        df3.delete_one(Point, df3.read_one(Point, 0))
+        df3.sync()
+        df2.pull()
+        self.assertEqual(5.5, df2.read_one(Point, 1).y)
+        self.assertIsNone(df2.read_one(Point, 0))
+        df1.checkout()
+        self.assertListEqual(
+            [1, 2], sorted(p.oid for p in df1.read_all(Point)))
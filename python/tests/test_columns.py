@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from rtypes import pcc_set, primarykey, dimension
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps, Point
+
+
+@pcc_set
+class Segment(object):
+    oid = primarykey(int)
+    start = dimension(Point)
+    length = dimension(int)
+
+    def __init__(self, oid, start, length):
+        self.oid = oid
+        self.start = start
+        self.length = length
+
+
+class TestReadColumns(unittest.TestCase):
+    @on_both_heaps
+    def test_read_columns(self, heap_as):
+        df = Dataframe("TEST_READ_COLUMNS", [Point, Segment], heap_as=heap_as)
+        points = [Point(i, i, i / 2, str(i)) for i in range(4)]
+        df.add_many(Point, points)
+        df.add_many(Segment, [Segment(0, points[2], 5)])
+        points[1].x = 10
+        oids, columns = df.read_columns(Point, ["x", "y", "label"])
+        self.assertListEqual([0, 1, 2, 3], sorted(oids))
+        rows = {
+            oid: (x, y, label) for oid, x, y, label in zip(
+                oids, columns["x"], columns["y"], columns["label"])}
+        self.assertEqual((10, 0.5, "1"), rows[1])
+        self.assertEqual(np.int64, columns["x"].dtype)
+        self.assertEqual(np.float64, columns["y"].dtype)
+        self.assertIsInstance(columns["label"], list)
+        self.assertEqual(15, df.read_column(Point, "x")[1].sum())
+        _, starts = df.read_column(Segment, "start")
+        self.assertIs(points[2], starts[0])
+        # Missing values cannot go into a numpy array.
+        points[0].x = None
+        _, xs = df.read_column(Point, "x")
+        self.assertIsInstance(xs, list)
+        self.assertIn(None, xs)
+
+
+class TestWriteColumn(unittest.TestCase):
+    @on_both_heaps
+    def test_write_column(self, heap_as):
+        df1 = Dataframe("TEST_WRITE_COLUMN1", [Point])
+        df2 = Dataframe(
+            "TEST_WRITE_COLUMN2", [Point], details=df1.details,
+            heap_as=heap_as)
+        points = [Point(i, i, float(i), str(i)) for i in range(4)]
+        df2.add_many(Point, points)
+        df2.commit()
+        df2.write_column(Point, "x", np.array([0, 2]), np.array([5, 7]))
+        self.assertEqual(7, points[2].x)
+        change = df2.local_heap.diff[Point.__r_meta__.name][2]
+        self.assertIs(int, type(change["dims"]["x"]))
+        updated = df2.update_where(
+            Point, "y", lambda cols: cols["y"] * 2 + cols["x"],
+            where=lambda cols: cols["x"] > 4, dimnames=["x", "y"])
+        self.assertEqual(2, updated)
+        self.assertEqual(5.0, points[0].y)
+        self.assertEqual(11.0, points[2].y)
+        self.assertEqual(1.0, points[1].y)
+        df2.update_where(Point, "label", lambda cols: [
+            label + "!" for label in cols["label"]])
+        self.assertEqual("3!", points[3].label)
+        with self.assertRaises(KeyError):
+            df2.write_column(Point, "x", [10], [1])
+        with self.assertRaises(ValueError):
+            df2.write_column(Point, "x", [0, 1], [1])
+        with self.assertRaises(ValueError):
+            df2.write_column(Point, "oid", [0], [9])
+        df2.sync()
+        df1.checkout()
+        self.assertListEqual(
+            [(5, 5.0, "0!"), (1, 1.0, "1!"), (7, 11.0, "2!"), (3, 3.0, "3!")],
+            [(p.x, p.y, p.label) for p in sorted(
+                df1.read_all(Point), key=lambda p: p.oid)])
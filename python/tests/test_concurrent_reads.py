@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps, Point
+
+
+class TestConcurrentReads(unittest.TestCase):
+    @on_both_heaps
+    def test_concurrent_reads(self, heap_as):
+        df1 = Dataframe("TEST_CONCURRENT1", [Point])
+        df2 = Dataframe(
+            "TEST_CONCURRENT2", [Point], details=df1.details,
+            heap_as=heap_as)
+        df1.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(50)])
+        df1.commit()
+        df2.pull()
+        points = df2.read_all(Point)
+        done = threading.Event()
+        wrong = list()
+
+        def read():
+            while not done.is_set():
+                wrong.extend(
+                    (p.oid, p.x) for p in points if p.x != p.oid)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            # Rows of the points move into the holes left by the churn.
+            for i in range(20):
+                churn = [
+                    Point(1000 + 20 * i + j, -1, -1.0, "")
+                    for j in range(20)]
+                df1.add_many(Point, churn)
+                df1.commit()
+                df2.pull()
+                for point in churn:
+                    df1.delete_one(Point, point)
+                df1.commit()
+                df2.pull()
+        finally:
+            done.set()
+            reader.join()
+        self.assertListEqual([], wrong)
+        self.assertEqual(50, len(df2.read_all(Point)))
@@ -0,0 +1,187 @@
+import unittest
+
+import cbor
+import numpy as np
+
+from rtypes import pcc_set, primarykey, dimension
+from rtypes.utils.converter import convert, unconvert, get_codec
+from rtypes.utils.enums import Datatype
+from spacetime import Dataframe
+from spacetime.managers.diff import same_value
+from spacetime.utils.utils import (
+    extract_buffers, get_buffer_dims, insert_buffers)
+
+
+@pcc_set
+class Owner(object):
+    oid = primarykey(int)
+    name = dimension(str)
+
+    def __init__(self, oid, name):
+        self.oid = oid
+        self.name = name
+
+
+class TestConverter(unittest.TestCase):
+    def roundtrip(self, dim_type, value):
+        # Values have to survive the trip over the wire unchanged.
+        return unconvert(
+            cbor.loads(cbor.dumps(convert(dim_type, value))), dim_type)
+
+    def test_basic_types_are_untagged(self):
+        for dim_type, value in [
+                (int, 1), (str, "a"), (float, 1.5), (bool, True),
+                (bytes, b"ab")]:
+            self.assertIs(value, convert(dim_type, value))
+            self.assertEqual(value, self.roundtrip(dim_type, value))
+        self.assertIsNone(convert(int, None))
+        self.assertIsNone(unconvert(None, int))
+
+    def test_containers(self):
+        self.assertEqual(
+            [Datatype.TUPLE, 1, "a"], convert(tuple, (1, "a")))
+        self.assertEqual((1, "a", [2]), self.roundtrip(tuple, (1, "a", [2])))
+        self.assertEqual([1, (2, 3)], self.roundtrip(list, [1, (2, 3)]))
+        self.assertEqual([], self.roundtrip(list, []))
+
+    def test_foreign_key(self):
+        owner = Owner(7, "seven")
+        self.assertEqual([Datatype.FOREIGNKEY, 7], convert(Owner, owner))
+        ref = self.roundtrip(Owner, owner)
+        self.assertIsInstance(ref, Owner)
+        self.assertEqual(7, ref.__r_oid__)
+
+    def test_codecs_match_convert(self):
+        for dim_type, value in [
+                (int, 3), (str, "a"), (tuple, (1, "b")), (list, [1.5]),
+                (Owner, Owner(8, "eight"))]:
+            encode, decode = get_codec(dim_type)
+            self.assertEqual(convert(dim_type, value), encode(value))
+            self.assertIsNone(encode(None))
+            self.assertIsNone(decode(None))
+        encode, decode = get_codec(tuple)
+        self.assertEqual((1, "b"), decode(encode((1, "b"))))
+
+    def test_object_codec(self):
+        owner = Owner(9, "nine")
+        dim_map = Owner.__r_meta__.encode_obj(owner)
+        self.assertDictEqual({"oid": 9, "name": "nine"}, dim_map)
+        self.assertDictEqual(
+            {"oid": 9, "name": "nine"},
+            Owner.__r_meta__.decode_obj(dim_map))
+        Owner.__r_table__.take_control(owner)
+        self.assertDictEqual(dim_map, Owner.__r_table__[9])
+
+
+@pcc_set
+class Sensor(object):
+    oid = primarykey(int)
+    reading = dimension(np.ndarray)
+
+    def __init__(self, oid, reading):
+        self.oid = oid
+        self.reading = reading
+
+
+class TestNDArrayDimension(unittest.TestCase):
+    def test_read_is_view(self):
+        df = Dataframe("TEST_NDARRAY", [Sensor])
+        reading = np.array(np.arange(12).reshape(3, 4), dtype=np.float32)
+        sensor = Sensor(0, reading)
+        df.add_one(Sensor, sensor)
+        first, second = sensor.reading, sensor.reading
+        self.assertEqual((3, 4), first.shape)
+        self.assertEqual(np.float32, first.dtype)
+        self.assertFalse(first.flags.writeable)
+        self.assertTrue(np.shares_memory(first, second))
+
+    def test_app_array_stays_writable(self):
+        df = Dataframe("TEST_NDARRAY_OWNED", [Sensor])
+        position = np.zeros(3)
+        sensor = Sensor(0, position)
+        df.add_one(Sensor, sensor)
+        # The app keeps its array, the dataframe stored a copy.
+        position += 1
+        self.assertTrue(position.flags.writeable)
+        self.assertFalse(np.shares_memory(position, sensor.reading))
+        self.assertEqual(0, sensor.reading[0])
+        sensor.reading = position
+        position += 1
+        self.assertEqual(1, sensor.reading[0])
+
+    def test_shared_memory_is_copied(self):
+        df = Dataframe("TEST_NDARRAY_SHARED", [Sensor])
+        buffer = np.zeros(8)
+        sensor = Sensor(0, buffer[2:])
+        df.add_one(Sensor, sensor)
+        # The app can still write through buffer, so the view was copied.
+        buffer[2] = 5
+        self.assertEqual(0, sensor.reading[0])
+        self.assertTrue(buffer.flags.writeable)
+        # Arrays read from the dataframe are stored again as they are.
+        reading = sensor.reading
+        sensor.reading = reading
+        self.assertTrue(np.shares_memory(reading, sensor.reading))
+
+    def test_rewrite_same_array(self):
+        df = Dataframe("TEST_NDARRAY_REWRITE", [Sensor])
+        sensor = Sensor(0, np.zeros(4))
+        df.add_one(Sensor, sensor)
+        df.commit()
+        sensor.reading = sensor.reading
+        self.assertDictEqual({}, df.local_heap.diff)
+        # Equal arrays in other memory are not compared, it is a write.
+        sensor.reading = np.zeros(4)
+        self.assertEqual(1, len(df.local_heap.diff))
+
+    def test_object_dtype_rejected(self):
+        with self.assertRaises(TypeError):
+            convert(np.ndarray, np.array([1, "a"], dtype=object))
+        with self.assertRaises(TypeError):
+            convert(tuple, (np.array([None]),))
+
+    def test_received_record_is_equal(self):
+        reading = np.zeros((2, 3))
+        name = Sensor.__r_meta__.name
+        local = {
+            name: {0: {"types": {}, "dims": {
+                "oid": 0,
+                "reading": convert(np.ndarray, reading)}}}}
+        # The same trip a record takes over the socket managers.
+        data, locations, buffers = extract_buffers(
+            local, get_buffer_dims([Sensor]))
+        received = cbor.loads(cbor.dumps(data))
+        insert_buffers(
+            received, locations,
+            [memoryview(bytes(buffer)).toreadonly() for buffer in buffers])
+        self.assertEqual(local, received)
+        value = local[name][0]["dims"]["reading"]
+        other = received[name][0]["dims"]["reading"]
+        self.assertEqual(value[2:], other[2:])
+        nested = convert(tuple, (reading, 1))
+        self.assertTrue(
+            same_value(nested, cbor.loads(cbor.dumps(nested))))
+
+    def test_structured_dtype(self):
+        dtype = np.dtype([("x", "<f8"), ("y", "<i4")])
+        reading = np.zeros(2, dtype=dtype)
+        reading["y"] = [1, 2]
+        self.assertTrue(np.array_equal(
+            reading, unconvert(
+                cbor.loads(cbor.dumps(
+                    convert(tuple, (reading,)))), tuple)[0]))
+
+    def test_push_pull_frames(self):
+        df1 = Dataframe("TEST_NDARRAY1", [Sensor])
+        df2 = Dataframe("TEST_NDARRAY2", [Sensor], details=df1.details)
+        df3 = Dataframe("TEST_NDARRAY3", [Sensor], details=df1.details)
+        reading = np.linspace(0, 1, 1000).reshape(10, 100)
+        df2.add_one(Sensor, Sensor(0, reading))
+        df2.sync()
+        df1.checkout()
+        self.assertTrue(np.array_equal(
+            reading, df1.read_one(Sensor, 0).reading))
+        df3.pull()
+        received = df3.read_one(Sensor, 0).reading
+        self.assertTrue(np.array_equal(reading, received))
+        self.assertFalse(received.flags.writeable)
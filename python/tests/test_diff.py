@@ -0,0 +1,54 @@
+import unittest
+
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps, Point
+
+
+class TestCommitIsolation(unittest.TestCase):
+    @on_both_heaps
+    def test_commit_isolation(self, heap_as):
+        df = Dataframe("TEST_COMMIT_ISOLATION", [Point], heap_as=heap_as)
+        point = Point(0, 1, 1.0, "a")
+        df.add_one(Point, point)
+        df.commit()
+        # The commit shares records with the version graph, later writes
+        # must not reach them.
+        point.x = 2
+        data, _ = df.versioned_heap.retrieve_data("TEST", "ROOT")
+        self.assertEqual(1, data[Point.__r_meta__.name][0]["dims"]["x"])
+        df.commit()
+        data, _ = df.versioned_heap.retrieve_data("TEST", "ROOT")
+        self.assertEqual(2, data[Point.__r_meta__.name][0]["dims"]["x"])
+
+
+class TestNoopWrites(unittest.TestCase):
+    @on_both_heaps
+    def test_noop_writes(self, heap_as):
+        df1 = Dataframe("TEST_NOOP1", [Point])
+        df2 = Dataframe(
+            "TEST_NOOP2", [Point], details=df1.details, heap_as=heap_as)
+        df1.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(3)])
+        df1.commit()
+        df2.pull()
+        tpname = Point.__r_meta__.name
+        diff = df2.local_heap.diff
+        point = df2.read_one(Point, 0)
+        point.x = 0
+        point.y = 5.0
+        point.y = 0.0
+        self.assertDictEqual({}, diff)
+        point.x = 7
+        point.label = "a"
+        point.label = "0"
+        self.assertDictEqual({"x": 7}, diff[tpname][0]["dims"])
+        df2.write_column(Point, "x", [0, 1, 2], [0, 1, 20])
+        self.assertDictEqual({2: {"x": 20}}, {
+            oid: change["dims"] for oid, change in diff[tpname].items()})
+        self.assertEqual(0, point.x)
+        # After a checkout the value from before it is a change again.
+        point.x = 9
+        df1.read_one(Point, 0).x = 3
+        df1.commit()
+        df2.pull()
+        point.x = 0
+        self.assertEqual(0, df2.local_heap.diff[tpname][0]["dims"]["x"])
@@ -0,0 +1,175 @@
+import unittest
+
+from rtypes import pcc_set, primarykey, dimension, grid
+from spacetime import Dataframe
+from spacetime.managers.indexes import RangeIndex
+from tests.heaps import on_both_heaps, Point
+
+
+@pcc_set
+class Tag(object):
+    oid = primarykey(int)
+    name = dimension(str, index=True)
+    point = dimension(Point, index=True)
+    weight = dimension(int)
+
+    def __init__(self, oid, name, point):
+        self.oid = oid
+        self.name = name
+        self.point = point
+        self.weight = 1
+
+
+class TestHashIndex(unittest.TestCase):
+    @on_both_heaps
+    def test_read_by(self, heap_as):
+        df1 = Dataframe("TEST_READ_BY1", [Point, Tag], heap_as=heap_as)
+        df2 = Dataframe(
+            "TEST_READ_BY2", [Point, Tag], details=df1.details,
+            heap_as=heap_as)
+        points = [Point(i, i, float(i), str(i)) for i in range(2)]
+        tags = [Tag(i, "even" if i % 2 == 0 else "odd", points[i % 2])
+                for i in range(6)]
+        df1.add_many(Point, points)
+        df1.add_many(Tag, tags)
+
+        def oids(objs):
+            return sorted(obj.oid for obj in objs)
+        self.assertListEqual(
+            [0, 2, 4], oids(df1.read_by(Tag, "name", "even")))
+        self.assertListEqual(
+            [1, 3, 5], oids(df1.read_by(Tag, "point", points[1])))
+        self.assertListEqual([], df1.read_by(Tag, "name", "none"))
+        # Dimensions without an index are scanned.
+        self.assertListEqual(
+            list(range(6)), oids(df1.read_by(Tag, "weight", 1)))
+        tags[2].name = "odd"
+        df1.delete_one(Tag, tags[0])
+        self.assertListEqual([4], oids(df1.read_by(Tag, "name", "even")))
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [1, 2, 3, 5], oids(df2.read_by(Tag, "name", "odd")))
+        df1.read_one(Tag, 4).name = "odd"
+        df1.commit()
+        df2.pull()
+        self.assertListEqual([], df2.read_by(Tag, "name", "even"))
+        self.assertIn(
+            df2.read_one(Tag, 4), df2.read_by(Tag, "point", points[0]))
+
+
+@pcc_set
+class Score(object):
+    oid = primarykey(int)
+    points = dimension(float, ordered=True)
+    level = dimension(int)
+
+    def __init__(self, oid, points):
+        self.oid = oid
+        self.points = points
+        self.level = oid % 3
+
+
+class TestRangeIndex(unittest.TestCase):
+    def test_mixed_oid_ties(self):
+        index = RangeIndex("points")
+        for oid in (1, "a", 2):
+            index.update(oid, {"points": 5.0})
+        self.assertListEqual([1, "a", 2], index.between(5.0, 5.0))
+        self.assertListEqual([2, "a", 1], list(index.descending()))
+        index.remove("a")
+        self.assertListEqual([1, 2], index.between())
+
+    @on_both_heaps
+    def test_range(self, heap_as):
+        df1 = Dataframe("TEST_RANGE1", [Score], heap_as=heap_as)
+        df2 = Dataframe(
+            "TEST_RANGE2", [Score], details=df1.details, heap_as=heap_as)
+        scores = [Score(i, float(i * 10 % 70)) for i in range(7)]
+        df1.add_many(Score, scores)
+
+        def oids(objs):
+            return [obj.oid for obj in objs]
+        # points: 0, 10, 20, 30, 40, 50, 60
+        self.assertListEqual(
+            [2, 3, 4], oids(df1.read_range(Score, "points", 20, 40)))
+        self.assertListEqual(
+            [5, 6], oids(df1.read_range(Score, "points", lo=45)))
+        self.assertListEqual(
+            [6, 5, 4], oids(df1.read_top(Score, "points", 3)))
+        scores[0].points = 100.0
+        scores[6].points = float("nan")
+        df1.delete_one(Score, scores[5])
+        self.assertListEqual(
+            [0, 4, 3], oids(df1.read_top(Score, "points", 3)))
+        # Dimensions without an index are sorted on the fly.
+        self.assertListEqual(
+            [1, 4], sorted(oids(df1.read_range(Score, "level", 1, 1))))
+        self.assertListEqual(
+            [2, 1], [s.level for s in df1.read_top(Score, "level", 2)])
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [1, 2, 3, 4, 0], oids(df2.read_range(Score, "points")))
+        df1.read_one(Score, 1).points = 35.0
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [3, 1], oids(df2.read_range(Score, "points", 30, 35)))
+
+
+@pcc_set
+class Marker(object):
+    oid = primarykey(int)
+    x = dimension(float)
+    y = dimension(float)
+    position = grid("x", "y", cell_size=10.0)
+
+    def __init__(self, oid, x, y):
+        self.oid = oid
+        self.x = x
+        self.y = y
+
+
+class TestGridIndex(unittest.TestCase):
+    @on_both_heaps
+    def test_grid(self, heap_as):
+        df1 = Dataframe("TEST_GRID1", [Marker, Point], heap_as=heap_as)
+        df2 = Dataframe(
+            "TEST_GRID2", [Marker], details=df1.details, heap_as=heap_as)
+        markers = [
+            Marker(i, float(i * 7 % 50), float(i * 3)) for i in range(10)]
+        df1.add_many(Marker, markers)
+
+        def oids(objs):
+            return sorted(obj.oid for obj in objs)
+        # (x, y): (0, 0) (7, 3) (14, 6) (21, 9) (28, 12) (35, 15) (42, 18)
+        # (49, 21) (6, 24) (13, 27)
+        self.assertListEqual(
+            [0, 1, 2, 8], oids(df1.read_within(Marker, (0, 0, 14, 24))))
+        self.assertListEqual(
+            [1, 0, 2], [m.oid for m in df1.read_near(Marker, (6, 2), 9)])
+        markers[1].x = 100.0
+        markers[2].y = float("nan")
+        df1.delete_one(Marker, markers[0])
+        self.assertListEqual(
+            [8], oids(df1.read_within(Marker, (0, 0, 14, 24))))
+        self.assertListEqual(
+            [1], oids(df1.read_near(Marker, (99, 3), 1.5)))
+        # Dims without a grid are scanned.
+        df1.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(5)])
+        self.assertListEqual(
+            [1, 2, 3],
+            oids(df1.read_within(Point, (1, 0, 3, 5), dims=("x", "y"))))
+        with self.assertRaises(TypeError):
+            df1.read_within(Point, (1, 0, 3, 5))
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [1, 3, 4, 5, 6, 7, 8, 9],
+            oids(df2.read_within(Marker, (0, 0, 100, 100))))
+        df1.read_one(Marker, 3).y = 50.0
+        df1.commit()
+        df2.pull()
+        self.assertListEqual(
+            [3], oids(df2.read_within(Marker, (20, 40, 30, 60))))
@@ -0,0 +1,38 @@
+import unittest
+
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps, Point
+from tests.test_columns import Segment
+from tests.test_indexes import Tag
+
+
+class TestJoin(unittest.TestCase):
+    @on_both_heaps
+    def test_join(self, heap_as):
+        df = Dataframe("TEST_JOIN", [Point, Segment, Tag], heap_as=heap_as)
+        points = [Point(i, i, float(i), str(i)) for i in range(3)]
+        df.add_many(Point, points)
+        df.add_many(Segment, [Segment(i, points[i % 2], i) for i in range(4)])
+        df.add_many(Tag, [Tag(i, str(i % 4), points[i % 3]) for i in range(9)])
+
+        def oids(pairs):
+            return sorted((left.oid, right.oid) for left, right in pairs)
+        # Segment.start has no index, Tag.point has one.
+        self.assertListEqual(
+            [(0, 0), (1, 1), (2, 0), (3, 1)],
+            oids(df.join(Segment, Segment.start, Point)))
+        self.assertListEqual(
+            [(i, i % 3) for i in range(9)],
+            oids(df.join(Tag, Tag.point, Point)))
+        pairs = df.join(Point, "label", Tag, "name")
+        self.assertListEqual(
+            [(0, 0), (0, 4), (0, 8), (1, 1), (1, 5), (2, 2), (2, 6)],
+            oids(pairs))
+        # The pairs hold the same proxies as read_one.
+        self.assertTrue(all(
+            left is df.read_one(Point, left.oid) for left, _ in pairs))
+        df.delete_one(Point, points[0])
+        self.assertListEqual(
+            [(1, 1), (3, 1)], oids(df.join(Segment, "start", Point)))
+        with self.assertRaises(TypeError):
+            df.join(Segment, "length", Point)
@@ -3,6 +3,7 @@ import unittest
 
 from spacetime.managers.version_graph import Graph
 from spacetime.utils.utils import merge_state_delta
+from spacetime.utils.enums import Event
 
 class TestGraph(unittest.TestCase):
     def test_graph_init(self):
@@ -248,6 +249,38 @@ class TestGraph(unittest.TestCase):
         self.assertEqual(second_node, graph.head)
         self.assertEqual(ROOT, graph.tail)
 
+
+class TestMergeStateDelta(unittest.TestCase):
+    def test_shares_unchanged_records(self):
+        new, mod, delete = Event.New, Event.Modification, Event.Delete
+        old = {
+            "A": {
+                1: {"types": {"A": new}, "dims": {"x": 1, "y": 1}},
+                2: {"types": {"A": new}, "dims": {"x": 2, "y": 2}}},
+            "B": {1: {"types": {"B": new}, "dims": {"z": 1}}}}
+        newer = {
+            "A": {
+                1: {"types": {"A": mod}, "dims": {"x": 10}},
+                3: {"types": {"A": new}, "dims": {"x": 3, "y": 3}}},
+            "C": {1: {"types": {"C": new}, "dims": {"w": 1}}}}
+        old_copy = {
+            tp: {oid: {k: dict(v) for k, v in change.items()}
+                 for oid, change in changes.items()}
+            for tp, changes in old.items()}
+        merged = merge_state_delta(old, newer)
+        # The inputs are not changed.
+        self.assertDictEqual(old_copy, old)
+        self.assertDictEqual({"x": 10, "y": 1}, merged["A"][1]["dims"])
+        self.assertDictEqual({"A": new}, merged["A"][1]["types"])
+        self.assertIs(old["A"][2], merged["A"][2])
+        self.assertIs(newer["A"][3], merged["A"][3])
+        self.assertIs(old["B"], merged["B"])
+        self.assertIs(newer["C"], merged["C"])
+        # Deleted objects are dropped when applied to a state.
+        deleted = merge_state_delta(
+            merged, {"A": {2: {"types": {"A": delete}}}}, delete_it=True)
+        self.assertListEqual([1, 3], list(deleted["A"]))
+        self.assertListEqual([1, 2, 3], list(merged["A"]))
         
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from rtypes import pcc_set, primarykey, dimension, projection
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps
+
+
+@pcc_set
+class Vehicle(object):
+    oid = primarykey(int)
+    xpos = dimension(int)
+    ypos = dimension(int)
+    model = dimension(str)
+    log = dimension(str)
+
+    def __init__(self, oid, model):
+        self.oid = oid
+        self.xpos = 0
+        self.ypos = 0
+        self.model = model
+        self.log = "x" * 100
+
+
+@projection(Vehicle, Vehicle.xpos, Vehicle.ypos)
+class VehiclePosition(object):
+    def move(self, dx, dy):
+        self.xpos += dx
+        self.ypos += dy
+
+
+class TestProjection(unittest.TestCase):
+    def test_metadata(self):
+        meta = VehiclePosition.__r_meta__
+        self.assertListEqual(["oid", "xpos", "ypos"], meta.dimnames)
+        self.assertIs(Vehicle, meta.root)
+        self.assertFalse(hasattr(VehiclePosition, "log"))
+
+    @on_both_heaps
+    def test_projection_pull(self, heap_as):
+        df1 = Dataframe("TEST_PROJECTION1", [Vehicle])
+        df2 = Dataframe(
+            "TEST_PROJECTION2", [VehiclePosition], details=df1.details,
+            heap_as=heap_as)
+        df1.add_many(Vehicle, [Vehicle(i, "M{0}".format(i)) for i in range(3)])
+        df1.commit()
+        df2.pull()
+        heap = df2.local_heap
+        tpname = Vehicle.__r_meta__.name
+        self.assertListEqual(["oid", "xpos", "ypos"], heap.stored_dims[tpname])
+        # Only the projected dims are pulled.
+        self.assertListEqual(
+            [], [dimname for dimname in ["model", "log"]
+                 if heap.read_dimension(Vehicle, 0, dimname) is not None])
+        positions = df2.read_all(VehiclePosition)
+        self.assertListEqual([0, 1, 2], sorted(p.oid for p in positions))
+        df2.read_one(VehiclePosition, 1).move(2, 3)
+        df2.commit()
+        df2.push_await()
+        df1.checkout()
+        vehicle = df1.read_one(Vehicle, 1)
+        self.assertEqual(
+            (2, 3, "M1"), (vehicle.xpos, vehicle.ypos, vehicle.model))
+        # Changes to dims outside the projection are not sent.
+        df1.read_one(Vehicle, 0).model = "N0"
+        df1.read_one(Vehicle, 2).xpos = 7
+        df1.commit()
+        data, _ = df1.versioned_heap.retrieve_data_nomaintain(
+            df2.socket_connector.parent_version,
+            df2.socket_connector.tpnames)
+        self.assertListEqual([2], list(data[tpname]))
+        df2.pull()
+        self.assertEqual(7, df2.read_one(VehiclePosition, 2).xpos)
+
+    @on_both_heaps
+    def test_unstored_dims(self, heap_as):
+        df1 = Dataframe("TEST_PROJECTION_UNSTORED1", [Vehicle])
+        df2 = Dataframe(
+            "TEST_PROJECTION_UNSTORED2", [VehiclePosition],
+            details=df1.details, heap_as=heap_as)
+        df1.add_many(Vehicle, [Vehicle(i, "M{0}".format(i)) for i in range(3)])
+        df1.commit()
+        df2.pull()
+        # Dims outside the projection read as None on both heaps.
+        oids, columns = df2.read_columns(Vehicle, ["xpos", "model"])
+        self.assertListEqual([0, 1, 2], sorted(oids))
+        self.assertListEqual([0, 0, 0], list(columns["xpos"]))
+        self.assertListEqual([None, None, None], list(columns["model"]))
+        self.assertIsNone(df2.local_heap.read_dimension(Vehicle, 1, "model"))
+        df2.write_column(Vehicle, "xpos", [1], [5])
+        self.assertEqual(5, df2.read_one(VehiclePosition, 1).xpos)
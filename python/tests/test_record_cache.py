@@ -0,0 +1,41 @@
+import unittest
+
+from spacetime import Dataframe
+from tests.heaps import on_both_heaps, Point
+
+
+class TestRecordCache(unittest.TestCase):
+    @on_both_heaps
+    def test_record_cache(self, heap_as):
+        df1 = Dataframe("TEST_RECORD_CACHE1", [Point], heap_as=heap_as)
+        df2 = Dataframe(
+            "TEST_RECORD_CACHE2", [Point], details=df1.details,
+            heap_as=heap_as)
+        df1.add_many(Point, [Point(i, i, float(i), str(i)) for i in range(3)])
+        df1.commit()
+        df2.pull()
+        first, last = df2.read_one(Point, 0), df2.read_one(Point, 2)
+        self.assertEqual((0, 2), (first.x, last.x))
+        # The last row moves into the hole left by the delete.
+        df2.delete_one(Point, first)
+        self.assertEqual(2, last.x)
+        last.x = 20
+        self.assertEqual(20, last.x)
+        df1.read_one(Point, 1).x = 10
+        df1.commit()
+        middle = df2.read_one(Point, 1)
+        self.assertEqual(1, middle.x)
+        df2.pull()
+        self.assertEqual(10, middle.x)
+        self.assertEqual(20, last.x)
+
+    def test_moving_records(self):
+        df = Dataframe("TEST_RECORD_CACHE_MOVING", [Point])
+        df.add_one(Point, Point(0, 7, 0.0, "a"))
+        heap = df.local_heap
+
+        class MovingHeap(type(heap)):
+            # Records are always being moved, the epoch never holds.
+            epoch = property(lambda self: object(), lambda self, value: None)
+        heap.__class__ = MovingHeap
+        self.assertEqual(7, df.read_one(Point, 0).x)
@@ -0,0 +1,68 @@
+import unittest
+
+from rtypes import pcc_set, primarykey, dimension
+from spacetime import Dataframe
+from spacetime.managers.managed_heap import ProxyTable
+
+
+@pcc_set
+class Probe(object):
+    oid = primarykey(int)
+    value = dimension(int)
+
+    def __init__(self, oid, value):
+        self.oid = oid
+        self.value = value
+
+
+class TestResident(unittest.TestCase):
+    def test_proxy_table(self):
+        table = ProxyTable(keep=2)
+        objs = [Probe(i, i) for i in range(5)]
+        for obj in objs:
+            table[obj.oid] = obj
+        held = objs[0]
+        del objs, obj
+        # Held by the application, or one of the last two made.
+        self.assertListEqual([0, 3, 4], sorted(table))
+        self.assertEqual(3, len(table))
+        self.assertIs(held, table.get(0))
+        self.assertIsNone(table.get(1))
+        self.assertIs(held, table.pop(0))
+        self.assertNotIn(0, table)
+
+    def test_resident(self):
+        df = Dataframe("TEST_RESIDENT", [Probe])
+        probes = [Probe(i, i) for i in range(3)]
+        self.assertEqual(3, df.resident(Probe)["table_rows"])
+        df.add_many(Probe, probes)
+        self.assertDictEqual(
+            {"proxies": 3, "table_rows": 0}, df.resident(Probe))
+        tracked = df.local_heap.tracked_objs[Probe.__r_meta__.name]
+        tracked._weaken(len(tracked.recent))
+        first = probes[0]
+        del probes
+        self.assertDictEqual(
+            {"proxies": 1, "table_rows": 0}, df.resident(Probe))
+        self.assertIs(first, df.read_one(Probe, 0))
+        self.assertEqual(1, df.read_one(Probe, 1).value)
+        # A deleted object keeps its values while it is held.
+        df.delete_one(Probe, first)
+        self.assertEqual(1, df.resident(Probe)["table_rows"])
+        self.assertEqual(0, first.value)
+        del first
+        self.assertEqual(0, df.resident(Probe)["table_rows"])
+
+    def test_add_to_second_dataframe(self):
+        df1 = Dataframe("TEST_RESIDENT_ADD1", [Probe])
+        df2 = Dataframe("TEST_RESIDENT_ADD2", [Probe])
+        probe, other = Probe(10, 1), Probe(11, 1)
+        df1.add_one(Probe, probe)
+        df1.add_many(Probe, [other])
+        df1.commit()
+        probe.value = other.value = 2
+        # The dims come from the heap of df1, the table has no row.
+        df2.add_one(Probe, probe)
+        df2.add_many(Probe, [other])
+        self.assertListEqual(
+            [2, 2], [df2.read_one(Probe, oid).value for oid in (10, 11)])
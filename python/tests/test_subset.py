@@ -2,6 +2,8 @@ from multiprocessing import Process, Event as MPEvent, Queue
 import unittest
 import time
 
+import numpy as np
+
 from rtypes import pcc_set, primarykey, dimension, subset, predicate
 from rtypes.utils.enums import Datatype
 
@@ -66,7 +68,53 @@ class RedActiveCar(object):
         return self.oid, self.xvel, self.yvel, self.xpos, self.ypos, self.color
 
 
+# Types of the values that FastCar.pred_func was called with.
+FAST_CALLS = list()
+
+@subset(Car)
+class FastCar(object):
+    @predicate(Car.xvel, Car.yvel, vectorized=True)
+    def pred_func(xvel, yvel):
+        FAST_CALLS.append(type(xvel))
+        return xvel * xvel + yvel * yvel > 25
+
+
+@pcc_set
+class Truck(object):
+    oid = primarykey(int)
+    speed = dimension(int)
+
+    def __init__(self, oid):
+        # speed is left unassigned.
+        self.oid = oid
+
+@subset(Truck)
+class MovingTruck(object):
+    @predicate(Truck.speed)
+    def pred_func(speed):
+        return speed > 0
+
+@subset(Truck)
+class FastTruck(object):
+    @predicate(Truck.speed, vectorized=True)
+    def pred_func(speed):
+        return speed > 50
+
+
 class TestSubset(unittest.TestCase):
+    def test_unassigned_dim(self):
+        df = Dataframe("test_unassigned", [Truck, MovingTruck, FastTruck])
+        trucks = [Truck(i) for i in range(3)]
+        df.add_one(Truck, trucks[0])
+        df.add_many(Truck, trucks[1:])
+        self.assertEqual(0, len(df.read_all(MovingTruck)))
+        self.assertEqual(0, len(df.read_all(FastTruck)))
+        trucks[1].speed = 60
+        df.write_column(Truck, "speed", [2], [10])
+        self.assertListEqual(
+            [1, 2], sorted(t.oid for t in df.read_all(MovingTruck)))
+        self.assertListEqual([1], [t.oid for t in df.read_all(FastTruck)])
+
     def test_one_df_subset(self):
         df = Dataframe("test", [Car, ActiveCar])
         car = Car(0, "BLUE")
@@ -78,12 +126,101 @@ class TestSubset(unittest.TestCase):
         self.assertEqual(1, len(df.read_all(Car)))
         self.assertEqual(1, len(df.read_all(ActiveCar)))
         acar = df.read_one(ActiveCar, 0)
-        self.assertEqual(acar.details, (0, 10, 10, 0, 0, "BLUE"))
+        self.assertEqual(acar.details(), (0, 10, 10, 0, 0, "BLUE"))
         self.assertIsInstance(acar, ActiveCar)
         df.commit()
         self.assertEqual(1, len(df.read_all(Car)))
         self.assertEqual(1, len(df.read_all(ActiveCar)))
-        self.assertEqual(acar.details, (0, 10, 10, 0, 0, "BLUE"))
+        self.assertEqual(acar.details(), (0, 10, 10, 0, 0, "BLUE"))
         self.assertIsInstance(acar, ActiveCar)
-        
-        
+
+    def test_nested_subset_membership(self):
+        df = Dataframe("test_nested", [Car, ActiveCar, RedCar, RedActiveCar])
+        cars = [Car(i, "RED" if i % 2 else "BLUE") for i in range(4)]
+        df.add_many(Car, cars)
+        cars[1].start((1, 0))
+        cars[2].start((0, 1))
+        self.assertListEqual(
+            [1, 2], sorted(c.oid for c in df.read_all(ActiveCar)))
+        self.assertListEqual(
+            [1, 3], sorted(c.oid for c in df.read_all(RedCar)))
+        self.assertListEqual(
+            [1], [c.oid for c in df.read_all(RedActiveCar)])
+        self.assertEqual(1, df.read_aggregate(ActiveCar, "sum", "xvel"))
+        racar = df.read_one(RedActiveCar, 1)
+        self.assertIsInstance(racar, RedActiveCar)
+        racar.xvel = 0
+        self.assertEqual(0, len(df.read_all(RedActiveCar)))
+        self.assertIsNone(df.read_one(ActiveCar, 1))
+        self.assertEqual((0, 0), (cars[1].xvel, cars[1].yvel))
+        self.assertEqual(1, df.read_aggregate(ActiveCar, "count"))
+        self.assertEqual(0, df.read_aggregate(ActiveCar, "sum", "xvel"))
+        df.delete_one(ActiveCar, df.read_one(ActiveCar, 2))
+        self.assertEqual(0, len(df.read_all(ActiveCar)))
+        self.assertIsNone(df.read_one(Car, 2))
+
+    def test_subset_pull(self):
+        df1 = Dataframe("test_pull1", [Car])
+        df2 = Dataframe("test_pull2", [ActiveCar], details=df1.details)
+        df3 = Dataframe("test_pull3", [Car, ActiveCar], details=df1.details)
+        df1.add_many(Car, [Car(i, "BLUE") for i in range(3)])
+        df1.read_one(Car, 1).start((2, 2))
+        df1.commit()
+        df2.pull()
+        df3.pull()
+        def stored():
+            return sorted(df2.local_heap.data[Car.__r_meta__.name])
+        # Only the members of the subset are sent.
+        self.assertListEqual([1], stored())
+        acars = df2.read_all(ActiveCar)
+        self.assertListEqual([1], [c.oid for c in acars])
+        acars[0].move()
+        self.assertEqual((2, 2), (acars[0].xpos, acars[0].ypos))
+        df1.read_one(Car, 0).start((1, 1))
+        df1.read_one(Car, 1).start((0, 0))
+        df1.commit()
+        df2.commit()
+        df2.push()
+        df2.pull()
+        self.assertListEqual(
+            [0], [c.oid for c in df2.read_all(ActiveCar)])
+        # Car 1 left the subset, car 0 joined it with all its dims.
+        self.assertListEqual([0], stored())
+        self.assertEqual("BLUE", df2.read_one(ActiveCar, 0).color)
+        df3.pull()
+        self.assertListEqual(
+            [(0, Event.New), (1, Event.Delete)],
+            sorted((oid, event) for oid, event, _ in
+                   df3.changes_since_last_checkout(ActiveCar)))
+        df1.checkout()
+        self.assertEqual(2, df1.read_one(Car, 1).xpos)
+        df1.read_one(Car, 2).color = "RED"
+        df1.read_one(Car, 0).start((3, 3))
+        df1.delete_one(Car, df1.read_one(Car, 1))
+        df1.commit()
+        df2.pull()
+        self.assertListEqual([0], stored())
+        self.assertEqual(3, df2.read_one(ActiveCar, 0).xvel)
+        df1.delete_one(Car, df1.read_one(Car, 0))
+        df1.commit()
+        df2.pull()
+        self.assertListEqual([], stored())
+
+    def test_vectorized_predicate(self):
+        df1 = Dataframe("test_vectorized1", [Car, FastCar])
+        cars = [Car(i, "BLUE") for i in range(100)]
+        for car in cars:
+            car.xvel, car.yvel = car.oid % 10, 3
+        del FAST_CALLS[:]
+        df1.add_many(Car, cars)
+        # One call for all of the objects.
+        self.assertListEqual([np.ndarray], FAST_CALLS)
+        fast = sorted(c.oid for c in df1.read_all(FastCar))
+        self.assertListEqual(
+            [oid for oid in range(100) if oid % 10 >= 5], fast)
+        cars[0].xvel = 10
+        self.assertIsNotNone(df1.read_one(FastCar, 0))
+        df1.commit()
+        df2 = Dataframe("test_vectorized2", [FastCar], details=df1.details)
+        self.assertListEqual(
+            [0] + fast, sorted(c.oid for c in df2.read_all(FastCar)))
@@ -5,7 +5,6 @@ import time
 from spacetime.managers.version_manager import VersionManager
 from rtypes.types.pcc_set import pcc_set
 from rtypes.attributes import dimension, primarykey
-from rtypes.utils.enums import Datatype
 from spacetime.utils.enums import Event
 
 
@@ -36,11 +35,11 @@ package1 = {
     carname: {
         0: {
             "dims": {
-                "oid": {"type": Datatype.INTEGER, "value": 0},
-                "xvel": {"type": Datatype.INTEGER, "value": 0},
-                "yvel": {"type": Datatype.INTEGER, "value": 0},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 0,
+                "xvel": 0,
+                "yvel": 0,
+                "xpos": 0,
+                "ypos": 0
             },
             "types": {
                 carname: Event.New
@@ -53,7 +52,7 @@ package2 = {
     carname: {
         0: {
             "dims": {
-                "xvel": {"type": Datatype.INTEGER, "value": 1}
+                "xvel": 1
             },
             "types": {
                 carname: Event.Modification
@@ -66,11 +65,11 @@ package3 = {
     carname: {
         0: {
             "dims": {
-                "oid": {"type": Datatype.INTEGER, "value": 0},
-                "xvel": {"type": Datatype.INTEGER, "value": 1},
-                "yvel": {"type": Datatype.INTEGER, "value": 0},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 0,
+                "xvel": 1,
+                "yvel": 0,
+                "xpos": 0,
+                "ypos": 0
             },
             "types": {
                 carname: Event.New
@@ -83,7 +82,7 @@ package4 = {
     carname: {
         0: {
             "dims": {
-                "yvel": {"type": Datatype.INTEGER, "value": 1}
+                "yvel": 1
             },
             "types": {
                 carname: Event.Modification
@@ -96,11 +95,11 @@ package5 = {
     carname: {
         0: {
             "dims": {
-                "oid": {"type": Datatype.INTEGER, "value": 0},
-                "xvel": {"type": Datatype.INTEGER, "value": 1},
-                "yvel": {"type": Datatype.INTEGER, "value": 1},
-                "xpos": {"type": Datatype.INTEGER, "value": 0},
-                "ypos": {"type": Datatype.INTEGER, "value": 0}
+                "oid": 0,
+                "xvel": 1,
+                "yvel": 1,
+                "xpos": 0,
+                "ypos": 0
             },
             "types": {
                 carname: Event.New